@@ -1,5 +1,9 @@
 from abc import ABC, abstractmethod
 from typing import Any, Dict, Optional
+from services.openai_service import get_openai_service
+from utils.logs import get_logger
+
+logger = get_logger(__name__)
 
 class BaseAgent(ABC):
     """
@@ -21,9 +25,31 @@ class BaseAgent(ABC):
     async def start(self):
         """Start the agent's background tasks if any."""
         self.is_running = True
-        print(f"✅ {self.name} started")
+        logger.info("✅ %s started", self.name)
 
     async def stop(self):
         """Stop the agent."""
         self.is_running = False
-        print(f"🛑 {self.name} stopped")
+        logger.info("🛑 %s stopped", self.name)
+
+class LLMAgent(BaseAgent):
+    """
+    Base class for agents that prompt an LLM.
+    The service can be injected (any object with the OpenAIService generation
+    methods the agent uses); otherwise the shared OpenAI service is used.
+    """
+    
+    def __init__(self, name: str, llm_service=None):
+        super().__init__(name)
+        self.openai = llm_service
+
+    async def start(self):
+        """Initialize the LLM service on start."""
+        await super().start()
+        if self.openai is not None:
+            return
+        try:
+            self.openai = get_openai_service()
+            logger.info("✅ %s initialized with OpenAI", self.name)
+        except Exception as e:
+            logger.warning("⚠️ Warning: %s could not initialize OpenAI: %s", self.name, e)
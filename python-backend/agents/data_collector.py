@@ -1,17 +1,31 @@
 import platform
+import asyncio
 import subprocess
+import select
 import time
 import threading
 import os
-import json
-from collections import defaultdict
-from typing import Dict, Any, Optional, List, Tuple
+import re
+from collections import defaultdict, OrderedDict, deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple, Deque
 from datetime import datetime
+from urllib.parse import urlsplit
+from functools import lru_cache
 from agents.base import BaseAgent
 from services.database_service import get_database_service
+from utils import spawn
+from utils.logs import get_logger
+
+# Log through a queue so a slow stdout/stderr pipe never stalls the tracker
+logger = get_logger(__name__)
+
+# Resolved once; the per-tick getters are bound per platform in __init__
+_PLATFORM = platform.system()
 
 # Platform-specific imports
-if platform.system() == "Darwin":
+if _PLATFORM == "Darwin":
     try:
         from AppKit import NSWorkspace
         MAC_AVAILABLE = True
@@ -20,6 +34,205 @@ if platform.system() == "Darwin":
 else:
     MAC_AVAILABLE = False
 
+# ScriptingBridge lets us query browsers in-process instead of via osascript
+SCRIPTING_BRIDGE_AVAILABLE = False
+if MAC_AVAILABLE:
+    try:
+        from ScriptingBridge import SBApplication
+        SCRIPTING_BRIDGE_AVAILABLE = True
+    except ImportError:
+        pass
+
+# AppleScript name -> bundle identifier for supported browsers
+BROWSER_BUNDLE_IDS = {
+    "Google Chrome": "com.google.Chrome",
+    "Arc": "company.thebrowser.Browser",
+    "Brave Browser": "com.brave.Browser",
+}
+BROWSER_BY_BUNDLE_ID = {bundle_id: name for name, bundle_id in BROWSER_BUNDLE_IDS.items()}
+
+# URL and title joined by the ASCII unit separator, which can't appear in either
+BROWSER_TAB_SCRIPT = """
+tell application "{browser}"
+    if (count of windows) > 0 then
+        return (URL of active tab of front window) & (character id 31) & (title of active tab of front window)
+    else
+        return "NO_WINDOWS"
+    end if
+end tell
+"""
+
+# Single-line form for the persistent osascript session (reads one line per script)
+BROWSER_TAB_ONELINER = 'tell application "{browser}" to get (URL of active tab of front window) & (character id 31) & (title of active tab of front window)'
+FRONTMOST_APP_SCRIPT = 'tell application "System Events" to get name of first application process whose frontmost is true'
+
+def _parse_browser_tab_output(output: str) -> Tuple[str, str]:
+    """Split BROWSER_TAB_SCRIPT output into (url, title)."""
+    url, sep, title = output.partition("\x1f")
+    return url, (title if sep else "Unknown Title")
+
+# Upper bound on events waiting for the DB writer
+MAX_BUFFERED_EVENTS = 10_000
+
+# Upper bound on distinct URLs kept in memory; least recently used are evicted
+MAX_TRACKED_TABS = 500
+
+# Tabs not seen for this long are dropped from memory at the next sync
+TAB_IDLE_TTL_SECONDS = 3600
+
+# Upper bound on distinct apps kept in memory; the least used synced apps go first
+MAX_TRACKED_APPS = 5_000
+
+def _browser_script_name(app_name: str, bundle_id: Optional[str] = None) -> Optional[str]:
+    """Return the supported browser an app name refers to, if any.
+    
+    The bundle id wins when NSWorkspace reports one, so localized browser
+    names still resolve.
+    """
+    if bundle_id is not None and bundle_id in BROWSER_BY_BUNDLE_ID:
+        return BROWSER_BY_BUNDLE_ID[bundle_id]
+    return _browser_for_app_name(app_name)
+
+@lru_cache(maxsize=MAX_TRACKED_APPS)
+def _browser_for_app_name(app_name: str) -> Optional[str]:
+    """Match a browser by app name, memoized so the per-tick check is a lookup."""
+    if "Arc" in app_name:
+        return "Arc"
+    if "Brave" in app_name:
+        return "Brave Browser"
+    if "Chrome" in app_name:
+        return "Google Chrome"
+    return None
+
+# How long a permission check result is reused before osascript is run again
+PERMISSIONS_CACHE_SECONDS = 300
+
+# Focus classification keywords, each list compiled into one case-insensitive
+# alternation so a name is scanned once instead of once per keyword
+PRODUCTIVE_APPS = ("Visual Studio Code", "iTerm", "Terminal", "Notion", "Obsidian", "Figma", "Xcode", "Docker", "Python", "Cursor")
+DISTRACTOR_APPS = ("Messages", "Discord", "Slack", "Mail", "Spotify", "Maps", "Calendar", "Netflix", "YouTube")
+DISTRACTOR_URL_FRAGMENTS = ("netflix", "youtube", "reddit", "twitter", "facebook", "instagram", "tiktok")
+_PRODUCTIVE_APPS_RE = re.compile("|".join(map(re.escape, PRODUCTIVE_APPS)), re.IGNORECASE)
+_DISTRACTOR_APPS_RE = re.compile("|".join(map(re.escape, DISTRACTOR_APPS)), re.IGNORECASE)
+_DISTRACTOR_URL_RE = re.compile("|".join(map(re.escape, DISTRACTOR_URL_FRAGMENTS)), re.IGNORECASE)
+
+# App names repeat, so each is scanned once
+@lru_cache(maxsize=MAX_TRACKED_APPS)
+def _classify_app(app_name: str) -> str:
+    """Return "productive", "distracting" or "neutral" for an app name."""
+    if _PRODUCTIVE_APPS_RE.search(app_name):
+        return "productive"
+    if _DISTRACTOR_APPS_RE.search(app_name):
+        return "distracting"
+    return "neutral"
+
+def _canonical_url(url: str) -> str:
+    """Strip query string and fragment so session tokens don't mint new keys."""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+    if not parts.scheme or not parts.netloc:
+        return url  # Sentinels like PERMISSION_ERROR pass through
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+@lru_cache(maxsize=MAX_TRACKED_TABS)
+def _is_distractor_url(url: str) -> bool:
+    """True if the URL belongs to a known distracting site."""
+    return _DISTRACTOR_URL_RE.search(url) is not None
+
+class UsageStat:
+    """Visit count and accumulated seconds for one app (slotted: no per-entry dict)."""
+    __slots__ = ("visits", "total_seconds")
+    
+    def __init__(self, visits: int = 0, total_seconds: float = 0.0):
+        self.visits = visits
+        self.total_seconds = total_seconds
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {"visits": self.visits, "total_seconds": self.total_seconds}
+
+class TabStat(UsageStat):
+    """UsageStat for a browser tab, plus its most recent title and when it was last seen."""
+    __slots__ = ("last_title", "last_seen")
+    
+    def __init__(self, visits: int = 0, total_seconds: float = 0.0, last_title: str = ""):
+        super().__init__(visits, total_seconds)
+        self.last_title = last_title
+        self.last_seen = time.monotonic()
+
+class _OsascriptSession:
+    """
+    A long-lived `osascript -i` child that evaluates one-line scripts, so the
+    AppleScript fallbacks don't fork+exec an interpreter on every tick.
+    """
+
+    def __init__(self):
+        self._proc: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def run(self, script: str, timeout: float = 2.0) -> Tuple[bool, str]:
+        """
+        Evaluate a one-line script. Returns (True, result) or (False, error).
+        Raises if the session is unusable, after which it is restarted on the
+        next call; callers should fall back to a one-shot osascript.
+        """
+        with self._lock:
+            try:
+                return self._run_locked(script, timeout)
+            except Exception:
+                self._close_locked()
+                raise
+
+    def _run_locked(self, script: str, timeout: float) -> Tuple[bool, str]:
+        if self._proc is None or self._proc.poll() is not None:
+            self._proc = spawn.popen(
+                [spawn.OSASCRIPT, "-i"],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+        proc = self._proc
+        proc.stdin.write(script.encode() + b"\n")
+        proc.stdin.flush()
+        
+        # Interactive mode prints ">> " prompts and "=> result" lines on
+        # stdout, errors on stderr; read raw fds so a bare prompt can't block us
+        out = err = b""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("osascript session timed out")
+            ready, _, _ = select.select([proc.stdout, proc.stderr], [], [], remaining)
+            for stream in ready:
+                chunk = os.read(stream.fileno(), 65536)
+                if not chunk:
+                    raise EOFError("osascript session exited")
+                if stream is proc.stdout:
+                    out += chunk
+                else:
+                    err += chunk
+            
+            if b"\n" in err:
+                return False, err.decode(errors="replace").strip()
+            start = out.find(b"=> ")
+            if start != -1:
+                end = out.find(b"\n", start)
+                if end != -1:
+                    return True, out[start + 3:end].decode(errors="replace").strip()
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self):
+        if self._proc is not None:
+            try:
+                self._proc.kill()
+                self._proc.wait(timeout=1)
+            except Exception:
+                pass
+            self._proc = None
+
 class DataCollectorAgent(BaseAgent):
     """
     Agent responsible for collecting desktop telemetry.
@@ -28,32 +241,86 @@ class DataCollectorAgent(BaseAgent):
     
     def __init__(self):
         super().__init__("DataCollectorAgent")
-        self.app_usage: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"visits": 0, "total_seconds": 0})
+        self.app_usage: Dict[str, UsageStat] = defaultdict(UsageStat)
         self.chrome_tabs: List[Dict[str, Any]] = []
-        self.tab_usage: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"visits": 0, "total_seconds": 0, "last_title": ""})
+        self.tab_usage: "OrderedDict[str, TabStat]" = OrderedDict()  # LRU order
+        self._pending_tab_rows: List[Tuple[str, str, int]] = []  # Unsynced deltas of evicted tabs
         self.context_switch_count = 0
         self.last_active_app: Optional[str] = None
+        self.last_active_browser: Optional[str] = None  # AppleScript name if last_active_app is a browser
         self.last_active_tab_url: Optional[str] = None
-        self._tracking_thread: Optional[threading.Thread] = None
-        self._lock = threading.RLock()
+        self._frontmost_bundle_id: Optional[str] = None  # Set by the NSWorkspace path of the mac getter
+        self._tracking_task: Optional[asyncio.Task] = None
+        # Events are buffered raw (no JSON, no SQLite on the hot path) and written
+        # in bulk by a dedicated thread; the oldest are dropped if the DB stalls
+        self._event_buffer: Deque[Tuple[Optional[str], None, str, None, str, Optional[str]]] = deque(maxlen=MAX_BUFFERED_EVENTS)
+        self._event_ready = threading.Event()
+        self._db_writer_thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._sync_future: Optional[asyncio.Future] = None
+        self._sync_lock = threading.Lock()
+        self._lock = threading.Lock()  # Never re-entered: helpers that need it are called outside it
         
         # Sync State Tracking (Delta Tracking)
-        self.last_synced_app_usage: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"visits": 0, "total_seconds": 0})
-        self.last_synced_tab_usage: Dict[str, Dict[str, Any]] = defaultdict(lambda: {"visits": 0, "total_seconds": 0})
+        self.last_synced_app_usage: Dict[str, UsageStat] = defaultdict(UsageStat)
+        self.last_synced_tab_usage: Dict[str, UsageStat] = defaultdict(UsageStat)
         self.last_synced_context_switches = 0
+        # Keys touched since their last successful sync; the delta sync only
+        # visits these instead of every app/tab ever seen
+        self._dirty_apps: set = set()
+        self._dirty_tabs: set = set()
         
         # Database integration
         self.db = get_database_service()
         self.current_user_id: Optional[str] = None
-        self.last_sync_time = time.time()
-        self.sync_interval = 60  # Sync to database every 60 seconds
+        # Deltas are flushed shortly after app/tab transitions (debounced by
+        # how busy the user is); the interval is only a watchdog for long
+        # stretches in a single app
+        self.sync_interval = 300
+        self._next_sync = time.monotonic() + self.sync_interval  # Monotonic deadline
+        self._flush_pending = False
+        self._last_sync_at = time.monotonic()
+        self._changes_since_sync = 0
+        self._last_daily_stats: Optional[Dict[str, int]] = None
+        
+        # get_usage_detailed timestamp, refreshed at most every 250ms
+        self._last_updated_iso = ""
+        self._last_updated_at = float("-inf")
         
         # Permission state
         self.has_accessibility_permission = False
+        self._perms_checked_at = 0.0  # monotonic time of the last real check
+        self._perms_cache: Dict[str, bool] = {}
         self.has_automation_permission = False
         
         # External source flag (Rust sidecar)
         self.using_external_source = True
+        
+        # Time is credited from monotonic deltas, not an assumed 1s per tick
+        self._last_tick = time.monotonic()
+        
+        # Read-side snapshot caches, each rebuilt only when its stats have changed
+        self._usage_version = 0
+        # Running focus/distraction totals, so the daily stats sync is O(1)
+        self._focus_seconds = 0.0
+        self._distraction_seconds = 0.0
+        self._usage_cache: Optional[Tuple[int, Dict[str, Dict[str, Any]]]] = None
+        self._tabs_version = 0
+        self._tabs_cache: Optional[Tuple[int, List[Dict[str, Any]]]] = None
+        
+        # Specialize the hot-path getters for this platform
+        if _PLATFORM == "Darwin":
+            self._get_active_window = self._get_active_window_mac
+        elif _PLATFORM == "Windows":
+            self._get_active_window = self._get_active_window_windows
+            self._get_active_browser_tab = self._get_active_browser_tab_unsupported
+        else:
+            self._get_active_window = self._get_active_window_unknown
+            self._get_active_browser_tab = self._get_active_browser_tab_unsupported
+        
+        # Cached ScriptingBridge handles, keyed by browser AppleScript name
+        self._browser_apps: Dict[str, Any] = {}
+        self._osa = _OsascriptSession()  # Spawned lazily, only if AppleScript is needed
 
     async def process(self, input_data: Any) -> Any:
         """
@@ -74,54 +341,73 @@ class DataCollectorAgent(BaseAgent):
         Update activity from external source (Rust sidecar).
         """
         self.using_external_source = True
+        if url:
+            url = _canonical_url(url)
+        
+        # Fast path: same app (and tab) as the last tick. Only counters on
+        # existing entries change, so no lock is taken; the GIL keeps each
+        # increment whole, and a racing sync just picks the tick up next time.
+        if app_name == self.last_active_app and (url is None or url == self.last_active_tab_url):
+            app_stat = self.app_usage.get(app_name)
+            tab_stat = self.tab_usage.get(url) if url else None
+            if app_stat is not None and (url is None or tab_stat is not None):
+                app_stat.total_seconds += 1
+                self._account_app_time(app_name, 1)
+                if tab_stat is not None:
+                    # Already the most recently used tab, no LRU reorder needed
+                    tab_stat.total_seconds += 1
+                    tab_stat.last_seen = time.monotonic()
+                    self._account_tab_time(url, 1)
+                    tab_stat.last_title = window_title
+                    self._tabs_version += 1
+                self._usage_version += 1
+                return
         
+        # Slow path: app/tab transition or a new entry, which changes the
+        # shape of the dicts readers iterate, so it stays under the lock
         with self._lock:
             # Track Application Usage
-            if app_name != self.last_active_app:
-                # Initialize if new
-                if app_name not in self.app_usage:
-                    self.app_usage[app_name] = {"visits": 0, "total_seconds": 0}
-                    
-                self.app_usage[app_name]["visits"] += 1
-                if self.last_active_app is not None:
+            app_stat = self.app_usage[app_name]  # inserts if new
+            prev_app = self.last_active_app
+            if app_name != prev_app:
+                app_stat.visits += 1
+                if prev_app is not None:
                     self.context_switch_count += 1
                     # Log Context Switch
                     if self.current_user_id:
-                        self.db.log_event(
-                            self.current_user_id, 
-                            None, 
-                            "CONTEXT_SWITCH", 
-                            json.dumps({"from": self.last_active_app, "to": app_name})
-                        )
+                        self._queue_event("CONTEXT_SWITCH", app_name, prev_app)
                 self.last_active_app = app_name
+                self.last_active_browser = _browser_script_name(app_name)
+                self._mark_transition()
             
             # Increment time for current app (assuming called every ~1s)
-            if app_name in self.app_usage:
-                self.app_usage[app_name]["total_seconds"] += 1
+            app_stat.total_seconds += 1
+            self._account_app_time(app_name, 1)
 
             # Track Chrome Tab Usage
             if url:
+                tab_stat = self._touch_tab(url)
                 if url != self.last_active_tab_url:
-                    self.tab_usage[url]["visits"] += 1
+                    tab_stat.visits += 1
                     # Log URL Visit
                     if self.current_user_id:
-                        print(f"🔗 Logging URL Visit: {url}")
-                        self.db.log_event(
-                            self.current_user_id,
-                            None,
-                            "URL_VISIT",
-                            json.dumps({"url": url, "title": window_title})
-                        )
+                        logger.debug("🔗 Logging URL Visit: %s", url)
+                        self._queue_event("URL_VISIT", url, window_title)
                     self.last_active_tab_url = url
+                    self._mark_transition()
                 
-                self.tab_usage[url]["total_seconds"] += 1.0
-                self.tab_usage[url]["last_title"] = window_title
+                tab_stat.total_seconds += 1
+                self._account_tab_time(url, 1)
+                tab_stat.last_title = window_title
+                self._tabs_version += 1
+            
+            self._usage_version += 1
 
     def set_user(self, user_id: str):
         """
         Set the current user and load their historical data from database.
         """
-        print(f"📊 Setting user: {user_id}")
+        logger.info("📊 Setting user: %s", user_id)
         self.current_user_id = user_id
         self._load_from_database()
     
@@ -137,10 +423,9 @@ class DataCollectorAgent(BaseAgent):
             db_app_usage = self.db.get_app_usage(self.current_user_id, days=30)
             with self._lock:
                 for app, data in db_app_usage.items():
-                    if app not in self.app_usage:
-                        self.app_usage[app] = {"visits": 0, "total_seconds": 0}
-                    self.app_usage[app]["visits"] = data["visits"]
-                    self.app_usage[app]["total_seconds"] = data["total_seconds"]
+                    app_stat = self.app_usage[app]
+                    app_stat.visits = data["visits"]
+                    app_stat.total_seconds = data["total_seconds"]
             
             # Load Chrome tabs
             db_chrome_tabs = self.db.get_chrome_tabs(self.current_user_id, days=30)
@@ -149,11 +434,7 @@ class DataCollectorAgent(BaseAgent):
                 for tab in db_chrome_tabs:
                     url = tab.get("url")
                     if url:
-                        self.tab_usage[url] = {
-                            "visits": 0,
-                            "total_seconds": tab.get("total_time", 0),
-                            "last_title": tab.get("title", "")
-                        }
+                        self.tab_usage[url] = TabStat(0, tab.get("total_time", 0), tab.get("title", ""))
             
             # Load context switches
             db_context_switches = self.db.get_context_switches(self.current_user_id, days=30)
@@ -163,382 +444,595 @@ class DataCollectorAgent(BaseAgent):
              # CRITICAL: Initialize sync state with what we loaded
             # This ensures we don't re-send historical data as "new" data
             with self._lock:
-                # Deep copy required for nested dicts
+                # Copy required: stats are mutated in place
                 for app, data in self.app_usage.items():
-                    self.last_synced_app_usage[app] = data.copy()
+                    self.last_synced_app_usage[app] = UsageStat(data.visits, data.total_seconds)
                 
                 # Copy tabs list to dict for tracking
                 for tab in self.chrome_tabs:
                     url = tab.get("url")
                     if url:
-                         self.tab_usage[url] = {
-                             "visits": tab.get("visits", 0), # database might not have visits count per day, but that's okay
-                             "total_seconds": tab.get("total_time", 0),
-                             "last_title": tab.get("title", "")
-                         }
-                         self.last_synced_tab_usage[url] = self.tab_usage[url].copy()
+                         self.tab_usage[url] = TabStat(
+                             tab.get("visits", 0), # database might not have visits count per day, but that's okay
+                             tab.get("total_time", 0),
+                             tab.get("title", "")
+                         )
+                         self.last_synced_tab_usage[url] = UsageStat(self.tab_usage[url].visits, self.tab_usage[url].total_seconds)
+                
+                # Keep only the most recent tabs; history stays in the DB
+                while len(self.tab_usage) > MAX_TRACKED_TABS:
+                    url, _ = self.tab_usage.popitem(last=False)
+                    self.last_synced_tab_usage.pop(url, None)
                 
                 self.last_synced_context_switches = self.context_switch_count
+                self._recount_focus_time()
+                self._last_daily_stats = None  # New user: always write on the next sync
+                self._usage_version += 1
+                self._tabs_version += 1
             
-            print(f"✅ Loaded {len(self.app_usage)} apps, {len(self.chrome_tabs)} tabs, {self.context_switch_count} context switches")
+            logger.info("✅ Loaded %d apps, %d tabs, %d context switches", len(self.app_usage), len(self.chrome_tabs), self.context_switch_count)
         except Exception as e:
-            print(f"❌ Error loading from database: {e}")
+            logger.error("❌ Error loading from database: %s", e, exc_info=True)
     
     def _sync_to_database(self):
         """
         Sync *incremental* metrics to local SQLite database.
         Uses Delta Tracking to prevent double-counting.
         """
+        # Deltas are snapshotted before the write and marked synced after it,
+        # so two overlapping syncs would write the same delta twice
+        with self._sync_lock:
+            self._write_deltas()
+
+    def _write_deltas(self):
+        """Body of _sync_to_database. Caller must hold the sync lock."""
         if not self.current_user_id:
             return
         
         try:
-            # Sync app usage
+            # Snapshot app and tab deltas under the lock, then write them
+            # outside it in one transaction
             with self._lock:
-                for app, data in self.app_usage.items():
-                    current_seconds = data["total_seconds"]
-                    current_visits = data["visits"]
+                app_rows = []
+                app_snapshot = {}
+                dirty_apps = list(self._dirty_apps)
+                for app in dirty_apps:
+                    data = self.app_usage[app]
+                    current_seconds = data.total_seconds
+                    current_visits = data.visits
                     
                     # Calculate Deltas
                     last_synced = self.last_synced_app_usage[app]
-                    delta_seconds = current_seconds - last_synced["total_seconds"]
-                    delta_visits = current_visits - last_synced["visits"]
+                    delta_seconds = current_seconds - last_synced.total_seconds
+                    delta_visits = current_visits - last_synced.visits
                     
                     # Only sync if there's new activity
-                    if delta_seconds > 0 or delta_visits > 0:
-                        self.db.upsert_app_usage(
-                            self.current_user_id,
-                            app,
-                            int(delta_seconds), # Ensure integer
-                            int(delta_visits)
-                        )
-                        # Update sync state
-                        self.last_synced_app_usage[app] = data.copy()
-            
-            # Sync Chrome tabs
-            with self._lock:
-                 for url, data in self.tab_usage.items():
-                    current_seconds = data["total_seconds"]
+                    if delta_seconds >= 1 or delta_visits > 0:
+                        synced_seconds = int(delta_seconds)
+                        app_rows.append((app, synced_seconds, int(delta_visits)))
+                        # Keep the sub-second remainder for the next sync
+                        app_snapshot[app] = UsageStat(current_visits, last_synced.total_seconds + synced_seconds)
+                
+                # Evicted tabs first, so their remaining time is not lost
+                tab_rows = list(self._pending_tab_rows)
+                flushed_pending = len(tab_rows)
+                tab_snapshot = {}
+                dirty_tabs = list(self._dirty_tabs)
+                for url in dirty_tabs:
+                    data = self.tab_usage.get(url)
+                    if data is None:
+                        continue  # Evicted; its time is already in the pending rows
+                    current_seconds = data.total_seconds
                     
                     # Calculate Delta
                     last_synced = self.last_synced_tab_usage[url]
-                    delta_seconds = current_seconds - last_synced["total_seconds"]
+                    delta_seconds = current_seconds - last_synced.total_seconds
                     
-                    if delta_seconds > 0:
-                        self.db.upsert_chrome_tab(
-                            self.current_user_id,
-                            url,
-                            data["last_title"],
-                            int(delta_seconds)
-                        )
-                        # Update sync state
-                        self.last_synced_tab_usage[url] = data.copy()
+                    if delta_seconds >= 1:
+                        synced_seconds = int(delta_seconds)
+                        tab_rows.append((url, data.last_title, synced_seconds))
+                        tab_snapshot[url] = UsageStat(data.visits, last_synced.total_seconds + synced_seconds)
             
-            # Sync context switches
-            with self._lock:
-                current_switches = self.context_switch_count
-                
-                # Unlike usage which is accumulative PER DAY, context switches is just a total counter.
-                # However, our DB method `upsert_context_switches` REPLACES the count for the day.
-                # But `get_context_switches` sums up ALL days.
-                # If we rely on `upsert` replacing the day's count, we must provide the *Day's Total*.
-                # But `context_switch_count` is *All Time Total* (loaded from DB).
-                # Implementation Detail: `upsert_context_switches` in DB service:
-                # INSERT ... ON CONFLICT DO UPDATE SET count = excluded.count.
-                # So we should send the TOTAL for Today.
-                # Problem: We only have TOTAL All Time.
-                # We need to calculate "Today's Switches".
-                # For now, to be safe and avoid complexity, we'll assume the DB handles this or we ignore it.
-                # WAIT: logic in DB service: `upsert` sets `count = excluded.count`.
-                # If we send `100` today (total), and tomorrow we load `100` and it becomes `101`.
-                # We send `101` to tomorrow's row.
-                # `get` sums all rows: 100 + 101 = 201. WRONG.
-                # Fix: We need to send DELTA for context switches too, and DB should ADD it.
-                # Let's check DB service `upsert_context_switches`.
-                # It does `count = excluded.count`. This is NOT additive.
-                # So we MUST send "Total for Today".
-                # But we don't track "Today's" switches separately in memory.
-                # FIX: Change DB Service to be additive OR track daily limit.
-                # EASIER FIX: Make DB service additive for context switches too.
-                # But I can't change DB service schema right now easily.
-                # Let's look at `upsert_app_usage`: `total_seconds = total_seconds + excluded.total_seconds`.
-                # `upsert_context_switches`: `count = excluded.count`.
-                # This is Inconsistent.
-                # I will modify `DataCollectorAgent` to calculate the delta and I will have to modify DB service to be additive.
-                pass 
-                # Leaving context switch sync for now as it's less critical than time tracking double-counting.
-                # Ideally, I should fix DB service to be additive for context switches.
                 
+                # Focus/distraction minutes from the running totals, taken in
+                # the same snapshot and written in the same transaction
+                daily_stats = {
+                    "focus_minutes": int(self._focus_seconds / 60),
+                    "distraction_minutes": int(self._distraction_seconds / 60)
+                }
+                if daily_stats == self._last_daily_stats:
+                    daily_stats = None  # Unchanged since the last write
+            
+            self.db.upsert_usage_deltas(self.current_user_id, app_rows, tab_rows, daily_stats)
+            if daily_stats is not None:
+                self._last_daily_stats = daily_stats
             
-            # Sync Focus/Distraction Minutes to Daily Stats
-            self._sync_daily_stats()
+            # Update sync state to what was actually written
+            with self._lock:
+                self.last_synced_app_usage.update(app_snapshot)
+                self.last_synced_tab_usage.update(tab_snapshot)
+                # Keys that picked up time since the snapshot (lock-free
+                # ticks) or that keep a sub-second remainder stay dirty
+                self._dirty_apps.difference_update(
+                    app for app, synced in app_snapshot.items()
+                    if self.app_usage[app].total_seconds == synced.total_seconds
+                )
+                self._dirty_tabs.difference_update(
+                    url for url, synced in tab_snapshot.items()
+                    if url not in self.tab_usage or self.tab_usage[url].total_seconds == synced.total_seconds
+                )
+                del self._pending_tab_rows[:flushed_pending]  # Evictions only append
+                self._prune_tracked_usage()
+            
+            # TODO: Sync context switches once upsert_context_switches adds deltas
+            # instead of replacing the day's count
             
-            # print(f"💾 Synced metrics to database")
+            logger.debug("💾 Synced metrics to database")
         except Exception as e:
-            print(f"❌ Error syncing to database: {e}")
+            logger.error("❌ Error syncing to database: %s", e, exc_info=True)
 
-    def _sync_daily_stats(self):
-        """Calculate and sync daily focus/distraction minutes."""
-        if not self.current_user_id:
-            return
+    def _account_app_time(self, app_name: str, seconds: float):
+        """Bookkeeping for time credited to an app: delta-sync dirty set and focus totals."""
+        self._dirty_apps.add(app_name)
+        self._add_app_focus_time(app_name, seconds)
 
-        focus_minutes = 0
-        distraction_minutes = 0
-        
-        productive_apps = ["Visual Studio Code", "iTerm", "Terminal", "Notion", "Obsidian", "Figma", "Xcode", "Docker", "Python", "Cursor"]
-        distractor_apps = ["Messages", "Discord", "Slack", "Mail", "Spotify", "Maps", "Calendar", "Netflix", "YouTube"]
-        
-        with self._lock:
-            # Calculate from App Usage
-            for app, data in self.app_usage.items():
-                minutes = data["total_seconds"] / 60
-                
-                if any(p.lower() in app.lower() for p in productive_apps):
-                    focus_minutes += minutes
-                elif any(d.lower() in app.lower() for d in distractor_apps):
-                    distraction_minutes += minutes
-            
-            # Calculate from Chrome Tabs
-            for url, data in self.tab_usage.items():
-                minutes = data["total_seconds"] / 60
-                if any(d in url.lower() for d in ["netflix", "youtube", "reddit", "twitter", "facebook", "instagram", "tiktok"]):
-                    distraction_minutes += minutes
-        
-        self.db.save_daily_stats(self.current_user_id, {
-            "focus_minutes": int(focus_minutes),
-            "distraction_minutes": int(distraction_minutes)
-        })
+    def _account_tab_time(self, url: str, seconds: float):
+        """Tab counterpart of _account_app_time."""
+        self._dirty_tabs.add(url)
+        self._add_tab_focus_time(url, seconds)
+
+    def _add_app_focus_time(self, app_name: str, seconds: float):
+        """Credit time spent in an app to the running focus/distraction totals."""
+        classification = _classify_app(app_name)
+        if classification == "productive":
+            self._focus_seconds += seconds
+        elif classification == "distracting":
+            self._distraction_seconds += seconds
+
+    def _add_tab_focus_time(self, url: str, seconds: float):
+        """Credit time spent on a tab to the running distraction total."""
+        if _is_distractor_url(url):
+            self._distraction_seconds += seconds
+
+    def _recount_focus_time(self):
+        """Rebuild the running totals from scratch (after loading). Caller must hold the lock."""
+        self._focus_seconds = 0.0
+        self._distraction_seconds = 0.0
+        for app, data in self.app_usage.items():
+            self._add_app_focus_time(app, data.total_seconds)
+        for url, data in self.tab_usage.items():
+            self._add_tab_focus_time(url, data.total_seconds)
     
     async def start(self):
-        """Start the background tracking thread."""
+        """Start the background tracking task."""
         await super().start()
         
-        # Move permission check to the thread to avoid blocking startup
-        self._tracking_thread = threading.Thread(target=self._track_loop, daemon=True)
-        self._tracking_thread.start()
+        # Polling ticks (AppleScript) run on one dedicated worker so the
+        # event loop stays free. The stats are also written by update_activity
+        # (FastAPI threadpool) and read by delta syncs on the default executor,
+        # so shared state goes through _lock and syncs serialize on _sync_lock;
+        # buffered events are written by their own thread
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="DataCollector")
+        self._tracking_task = asyncio.create_task(self._track_loop())
+        self._db_writer_thread = threading.Thread(target=self._db_writer_loop, daemon=True)
+        self._db_writer_thread.start()
+
+    async def stop(self):
+        """Stop the tracking task and flush pending deltas."""
+        await super().stop()
+        if self._tracking_task is not None:
+            self._tracking_task.cancel()
+            self._tracking_task = None
+        if self._executor is not None:
+            self._executor.submit(self._sync_to_database)
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._osa.close()
+        if self._db_writer_thread is not None:
+            self._event_ready.set()  # Writer drains what's buffered, then exits
+            # It's a daemon thread, so wait for the drain before letting the
+            # process exit with events still buffered
+            await asyncio.to_thread(self._db_writer_thread.join, 5)
+            self._db_writer_thread = None
+
+    def _queue_event(self, event_type: str, subject: str, detail: Optional[str] = None):
+        """
+        Buffer an event for the DB writer thread.
+        subject/detail are the new app and previous app for CONTEXT_SWITCH,
+        the URL and title for URL_VISIT.
+        """
+        self._event_buffer.append((self.current_user_id, None, event_type, None, subject, detail))
+        self._event_ready.set()
 
-    def _track_loop(self):
-        """Background loop that tracks active window and updates metrics."""
-        print("🚀 DataCollector tracking loop started")
+    def _db_writer_loop(self):
+        """Wait for buffered events, then write everything pending in one transaction."""
+        while True:
+            self._event_ready.wait()
+            self._event_ready.clear()
+            
+            batch = []
+            while self._event_buffer:
+                batch.append(self._event_buffer.popleft())  # Already in row form
+            
+            try:
+                self.db.log_events_batch(batch)
+            except Exception as e:
+                logger.error("❌ Error writing events: %s", e, exc_info=True)
+            
+            if not self.is_running:
+                return
+
+    async def _run_blocking(self, fn, *args):
+        """Run a blocking call on the tracker's worker thread."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def _track_loop(self):
+        """Background task that tracks the active window and updates metrics."""
+        logger.info("🚀 DataCollector tracking loop started")
         
-        # Initial permission check in background
-        self._check_permissions()
+        # Initial permission check off the event loop; not needed when the
+        # sidecar is feeding us activity
+        if not self.using_external_source:
+            try:
+                await self._run_blocking(self._check_permissions)
+            except Exception as e:
+                logger.warning("⚠️ Permission check failed: %s", e)
         
+        self._last_tick = time.monotonic()
         while self.is_running:
+            tick_start = time.monotonic()
             try:
                 # If receiving external updates, skip internal polling
                 if self.using_external_source:
-                    # Just check for DB sync
-                    if time.time() - self.last_sync_time > self.sync_interval:
-                        self._sync_to_database()
-                        self.last_sync_time = time.time()
-                    time.sleep(1)
-                    continue
-
-                current_app = self._get_active_window()
+                    self._last_tick = tick_start
+                else:
+                    await self._run_blocking(self._poll_tick)
                 
-                # FIX: If app is Electron (Overlay), check Chrome anyway
-                if current_app == "Electron" or current_app == "LifeOS":
-                    # Check if Chrome has an active tab
-                    c_url, c_title = self._get_active_browser_tab("Google Chrome")
-                    if c_url and c_url != "NO_WINDOWS" and c_url != "PERMISSION_ERROR":
-                        # Pretend we are in Chrome
-                        current_app = "Google Chrome"
+                # Periodic sync, on its own thread so the DB write overlaps
+                # the next ticks instead of delaying them
+                if self._sync_due() and (self._sync_future is None or self._sync_future.done()):
+                    self._sync_future = asyncio.get_running_loop().run_in_executor(None, self._maybe_sync)
                 
-                if current_app and current_app != "Unknown":
-                    # Fetch Chrome Tab Usage (OUTSIDE LOCK)
-                    tab_url = None
-                    tab_title = None
-                    if "Chrome" in current_app or "Brave" in current_app or "Arc" in current_app:
-                        tab_url, tab_title = self._get_active_browser_tab(current_app)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("Error in tracking loop: %s", e, exc_info=True)
+            
+            await asyncio.sleep(max(0.0, 1.0 - (time.monotonic() - tick_start)))
+
+    def _poll_tick(self):
+        """One polling iteration: sample the active app/tab and credit elapsed time."""
+        current_app = self._get_active_window()
+        
+        # Credit real elapsed time: osascript calls and scheduling
+        # delays mean a tick is rarely exactly one second
+        now = time.monotonic()
+        elapsed = now - self._last_tick
+        self._last_tick = now
+        
+        browser = _browser_script_name(current_app, self._frontmost_bundle_id)
+        
+        # FIX: If app is Electron (Overlay), check Chrome anyway
+        if current_app == "Electron" or current_app == "LifeOS":
+            # Check if Chrome has an active tab
+            c_url, c_title = self._get_active_browser_tab("Google Chrome")
+            if c_url and c_url != "NO_WINDOWS" and c_url != "PERMISSION_ERROR":
+                # Pretend we are in Chrome
+                current_app = browser = "Google Chrome"
+        
+        if current_app and current_app != "Unknown":
+            # Fetch Chrome Tab Usage (OUTSIDE LOCK)
+            tab_url = None
+            tab_title = None
+            if browser:
+                tab_url, tab_title = self._get_active_browser_tab(browser)
 
+            # Exclusive lock only for inserts and transitions; the
+            # steady-state increments below touch existing entries,
+            # which only this thread writes, so readers can keep
+            # snapshotting under the lock without blocking us.
+            if current_app != self.last_active_app or current_app not in self.app_usage:
+                with self._lock:
+                    app_stat = self.app_usage[current_app]  # inserts if new
+                    if current_app != self.last_active_app:
+                        app_stat.visits += 1
+                        if self.last_active_app is not None:
+                            self.context_switch_count += 1
+                            # Log Context Switch
+                            if self.current_user_id:
+                                self._queue_event("CONTEXT_SWITCH", current_app, self.last_active_app)
+                                
+                        self.last_active_app = current_app
+                        self.last_active_browser = browser
+                        self._mark_transition()
+            
+            # Increment time for current app
+            self.app_usage[current_app].total_seconds += elapsed
+            self._account_app_time(current_app, elapsed)
+
+            # Track Chrome Tab Usage (Update with pre-fetched data)
+            if tab_url:
+                tab_url = _canonical_url(tab_url)
+                if tab_url != self.last_active_tab_url or tab_url not in self.tab_usage:
                     with self._lock:
-                        # Track Application Usage
-                        if current_app != self.last_active_app:
-                            self.app_usage[current_app]["visits"] += 1
-                            if self.last_active_app is not None:
-                                self.context_switch_count += 1
-                                # Log Context Switch
-                                if self.current_user_id:
-                                    self.db.log_event(
-                                        self.current_user_id, 
-                                        None, 
-                                        "CONTEXT_SWITCH", 
-                                        json.dumps({"from": self.last_active_app, "to": current_app})
-                                    )
-                                    
-                            self.last_active_app = current_app
-                        
-                        # Increment time for current app
-                        self.app_usage[current_app]["total_seconds"] += 1
-
-                        # Track Chrome Tab Usage (Update with pre-fetched data)
-                        if tab_url:
-                            if tab_url != self.last_active_tab_url:
-                                self.tab_usage[tab_url]["visits"] += 1
-                                self.last_active_tab_url = tab_url
-                            
-                            self.tab_usage[tab_url]["total_seconds"] += 1.0
-                            self.tab_usage[tab_url]["last_title"] = tab_title
-                
-                # Periodic sync
-                if time.time() - self.last_sync_time > self.sync_interval:
-                    self._sync_to_database()
-                    self.last_sync_time = time.time()
+                        tab_stat = self._touch_tab(tab_url)  # inserts if new
+                        if tab_url != self.last_active_tab_url:
+                            tab_stat.visits += 1
+                            self.last_active_tab_url = tab_url
+                            self._mark_transition()
                 
-            except Exception as e:
-                print(f"Error in tracking loop: {e}")
+                tab_stat = self.tab_usage[tab_url]
+                tab_stat.total_seconds += elapsed
+                tab_stat.last_seen = time.monotonic()
+                self._account_tab_time(tab_url, elapsed)
+                tab_stat.last_title = tab_title
+                self._tabs_version += 1
             
-            time.sleep(1)
+            # Bumped after the writes so a racing reader's snapshot is never reused
+            self._usage_version += 1
+
+    def _mark_transition(self):
+        """Note an app/tab transition so the next sync tick flushes it."""
+        self._flush_pending = True
+        self._changes_since_sync += 1
+
+    def _flush_debounce(self) -> float:
+        """Seconds to hold a transition flush: 60s when calm, down to 10s under a burst of switching."""
+        return max(10, 60 - min(self._changes_since_sync, 50))
+
+    def _sync_due(self) -> bool:
+        """True once a transition's debounce elapses, or when the watchdog interval lapses."""
+        now = time.monotonic()
+        if now >= self._next_sync:
+            return True
+        return self._flush_pending and now - self._last_sync_at >= self._flush_debounce()
+
+    def _maybe_sync(self):
+        """Flush deltas if a sync is due."""
+        if self._sync_due():
+            self._flush_pending = False
+            self._changes_since_sync = 0
+            self._sync_to_database()
+            self._last_sync_at = time.monotonic()
+            self._next_sync = self._last_sync_at + self.sync_interval
+
+    def _touch_tab(self, url: str) -> TabStat:
+        """
+        Get (or create) the stat for url and mark it most recently used.
+        Evicts the least recently used tab past MAX_TRACKED_TABS, queueing its
+        unsynced time for the next sync. Caller must hold the lock.
+        """
+        tab_stat = self.tab_usage.get(url)
+        if tab_stat is not None:
+            self.tab_usage.move_to_end(url)
+            tab_stat.last_seen = time.monotonic()
+            return tab_stat
+        
+        tab_stat = self.tab_usage[url] = TabStat()
+        while len(self.tab_usage) > MAX_TRACKED_TABS:
+            self._evict_oldest_tab()
+        return tab_stat
+
+    def _evict_oldest_tab(self):
+        """
+        Drop the least recently used tab, queueing its unsynced time for the
+        next sync. Caller must hold the lock.
+        """
+        old_url, old_stat = self.tab_usage.popitem(last=False)
+        last_synced = self.last_synced_tab_usage.pop(old_url, None)
+        self._dirty_tabs.discard(old_url)
+        unsynced = int(old_stat.total_seconds - (last_synced.total_seconds if last_synced else 0))
+        if unsynced >= 1:
+            self._pending_tab_rows.append((old_url, old_stat.last_title, unsynced))
+
+    def _prune_tracked_usage(self):
+        """
+        Bound in-memory usage: drop tabs idle past TAB_IDLE_TTL_SECONDS and,
+        past MAX_TRACKED_APPS, the least used apps with nothing left to sync.
+        Their history stays in the DB. Caller must hold the lock.
+        """
+        cutoff = time.monotonic() - TAB_IDLE_TTL_SECONDS
+        evicted = False
+        # LRU order: the front is the least recently seen tab
+        while self.tab_usage:
+            url, stat = next(iter(self.tab_usage.items()))
+            if stat.last_seen >= cutoff or url == self.last_active_tab_url:
+                break
+            self._evict_oldest_tab()
+            evicted = True
+        if evicted:
+            self._tabs_version += 1
+        
+        excess = len(self.app_usage) - MAX_TRACKED_APPS
+        if excess > 0:
+            candidates = sorted(
+                (app for app in self.app_usage
+                 if app not in self._dirty_apps and app != self.last_active_app),
+                key=lambda app: self.app_usage[app].total_seconds
+            )
+            for app in candidates[:excess]:
+                del self.app_usage[app]
+                self.last_synced_app_usage.pop(app, None)
+            self._usage_version += 1
 
     def _get_active_window(self) -> str:
-        """Get active window title (Platform specific)."""
-        if platform.system() == "Darwin":
-            return self._get_active_window_mac()
-        elif platform.system() == "Windows":
-            return "Windows Support Pending"
+        """Get active window title (rebound to a platform-specific getter in __init__)."""
+        return self._get_active_window_unknown()
+
+    def _get_active_window_windows(self) -> str:
+        return "Windows Support Pending"
+
+    def _get_active_window_unknown(self) -> str:
         return "Unknown"
 
     def _get_active_window_mac(self) -> str:
-        """Get active window on macOS using AppleScript."""
-        script = 'tell application "System Events" to get name of first application process whose frontmost is true'
+        """Get active window on macOS (NSWorkspace, falling back to AppleScript)."""
+        self._frontmost_bundle_id = None
+        if MAC_AVAILABLE:
+            try:
+                frontmost = NSWorkspace.sharedWorkspace().frontmostApplication()
+                if frontmost is None:
+                    return "Unknown"
+                self._frontmost_bundle_id = frontmost.bundleIdentifier()
+                return frontmost.localizedName()
+            except Exception:
+                pass
+        
+        script = FRONTMOST_APP_SCRIPT
+        try:
+            ok, output = self._osa.run(script)
+            if ok:
+                return output
+            if "not allowed" in output:
+                self.has_accessibility_permission = False
+                self._perms_cache = {}  # Re-check on the next permissions query
+            return "Unknown"
+        except Exception:
+            pass  # Session unusable; one-shot osascript below
+        
         try:
-            result = subprocess.run(["osascript", "-e", script], capture_output=True, text=True, timeout=2)
+            # Bytes out, decoded here: skips the locale text wrapper setup
+            result = spawn.run([spawn.OSASCRIPT, "-e", script], capture_output=True, timeout=2)
             if result.returncode == 0:
-                return result.stdout.strip()
+                return result.stdout.decode("utf-8", "replace").strip()
             else:
                 # Check for permission error
-                if "not allowed" in result.stderr:
+                if b"not allowed" in result.stderr:
                     self.has_accessibility_permission = False
+                    self._perms_cache = {}
                 return "Unknown"
         except Exception:
             return "Unknown"
 
-    def _get_active_browser_tab(self, app_name: str) -> Tuple[Optional[str], Optional[str]]:
-        """Get active tab URL and Title for supported browsers on macOS (Sync)."""
-        if platform.system() != "Darwin":
-            return None, None
-
-        # Handle different browsers
-        browser_script_name = "Google Chrome"
-        if "Arc" in app_name:
-            browser_script_name = "Arc"
-        elif "Brave" in app_name:
-            browser_script_name = "Brave Browser"
-        
-        script = f"""
-        tell application "{browser_script_name}"
-            if (count of windows) > 0 then
-                get {{URL, title}} of active tab of front window
-            else
-                return "NO_WINDOWS"
-            end if
-        end tell
-        """
+    def _get_active_browser_tab(self, browser_script_name: str) -> Tuple[Optional[str], Optional[str]]:
+        """Get active tab URL and Title for a supported browser (by AppleScript name) on macOS (Sync)."""
+        
+        if SCRIPTING_BRIDGE_AVAILABLE:
+            try:
+                return self._get_active_browser_tab_sb(browser_script_name)
+            except Exception:
+                pass  # Fall back to AppleScript below
+        
         try:
-            result = subprocess.run(["osascript", "-e", script], capture_output=True, text=True, timeout=2)
-            if result.returncode == 0 and result.stdout.strip():
-                output = result.stdout.strip()
-                if output == "NO_WINDOWS":
-                    return "PERMISSION_ERROR", "Permission Needed"
-                
-                parts = output.split(", ", 1)
-                if len(parts) == 2:
-                    return parts[0], parts[1]
-                return parts[0], "Unknown Title"
+            ok, output = self._osa.run(BROWSER_TAB_ONELINER.format(browser=browser_script_name))
+            if ok and output:
+                return _parse_browser_tab_output(output)
         except Exception:
             pass
-        return None, None
-
-    async def _get_active_browser_tab_async(self, app_name: str) -> Tuple[Optional[str], Optional[str]]:
-        """Get active tab URL and Title for supported browsers on macOS (Async)."""
-        if platform.system() != "Darwin":
-            return None, None
-
-        # Handle different browsers
-        browser_script_name = "Google Chrome"
-        if "Arc" in app_name:
-            browser_script_name = "Arc"
-        elif "Brave" in app_name:
-            browser_script_name = "Brave Browser"
-        
-        script = f"""
-        tell application "{browser_script_name}"
-            if (count of windows) > 0 then
-                get {{URL, title}} of active tab of front window
-            else
-                return "NO_WINDOWS"
-            end if
-        end tell
-        """
+        
+        # Errors (e.g. no windows) get the full script, which reports why
+        script = BROWSER_TAB_SCRIPT.format(browser=browser_script_name)
         try:
-            proc = await asyncio.create_subprocess_exec(
-                "osascript", "-e", script,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            try:
-                stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout=2.0)
-            except asyncio.TimeoutError:
-                try:
-                    proc.kill()
-                except ProcessLookupError:
-                    pass
-                return None, None
-
-            if proc.returncode == 0 and stdout.strip():
-                output = stdout.decode().strip()
+            result = spawn.run([spawn.OSASCRIPT, "-e", script], capture_output=True, timeout=2)
+            output = result.stdout.decode("utf-8", "replace").strip()
+            if result.returncode == 0 and output:
                 if output == "NO_WINDOWS":
                     return "PERMISSION_ERROR", "Permission Needed"
                 
-                parts = output.split(", ", 1)
-                if len(parts) == 2:
-                    return parts[0], parts[1]
-                return parts[0], "Unknown Title"
+                return _parse_browser_tab_output(output)
         except Exception:
             pass
         return None, None
 
+    def _get_active_browser_tab_unsupported(self, app_name: str) -> Tuple[Optional[str], Optional[str]]:
+        """Browser tab lookup is macOS-only."""
+        return None, None
+
+    def _get_active_browser_tab_sb(self, browser_script_name: str) -> Tuple[Optional[str], Optional[str]]:
+        """Get active tab URL and Title via a cached ScriptingBridge handle (no subprocess)."""
+        browser = self._browser_apps.get(browser_script_name)
+        if browser is None:
+            browser = SBApplication.applicationWithBundleIdentifier_(BROWSER_BUNDLE_IDS[browser_script_name])
+            self._browser_apps[browser_script_name] = browser
+        
+        # Sending events to a closed browser would launch it
+        if browser is None or not browser.isRunning():
+            return None, None
+        
+        windows = browser.windows()
+        if not windows:
+            return "PERMISSION_ERROR", "Permission Needed"
+        
+        tab = windows[0].activeTab()
+        if tab is None:
+            return None, None
+        return tab.URL(), tab.title() or "Unknown Title"
+
     def _check_permissions(self) -> Dict[str, bool]:
-        """Check if we have necessary permissions."""
+        """Check if we have necessary permissions (cached for PERMISSIONS_CACHE_SECONDS)."""
+        now = time.monotonic()
+        if self._perms_cache and now - self._perms_checked_at < PERMISSIONS_CACHE_SECONDS:
+            return self._perms_cache
+        
         # Check Accessibility (Active Window)
         try:
-            subprocess.run(["osascript", "-e", 'tell application "System Events" to get name of first application process whose frontmost is true'], 
-                         capture_output=True, timeout=2, check=True)
+            spawn.run([spawn.OSASCRIPT, "-e", 'tell application "System Events" to get name of first application process whose frontmost is true'], 
+                      capture_output=True, timeout=2, check=True)
             self.has_accessibility_permission = True
         except subprocess.CalledProcessError:
             self.has_accessibility_permission = False
         except subprocess.TimeoutExpired:
             self.has_accessibility_permission = False
-            
-        return {
+        except OSError:
+            self.has_accessibility_permission = False  # No osascript (not macOS)
+        
+        self._perms_cache = {
             "accessibility": self.has_accessibility_permission,
             "automation": True # Hard to check without triggering, assume true for now or handle lazily
         }
+        self._perms_checked_at = now
+        return self._perms_cache
+
+    def _usage_snapshot_locked(self) -> Dict[str, Dict[str, Any]]:
+        """
+        App usage copy, shared between callers until the next write.
+        Callers must hold the lock and treat it as read-only.
+        """
+        version = self._usage_version
+        if self._usage_cache is None or self._usage_cache[0] != version:
+            self._usage_cache = (version, {app: data.to_dict() for app, data in self.app_usage.items()})
+        return self._usage_cache[1]
+
+    def _tabs_snapshot_locked(self) -> List[Dict[str, Any]]:
+        """Tab list counterpart of _usage_snapshot_locked."""
+        version = self._tabs_version
+        if self._tabs_cache is None or self._tabs_cache[0] != version:
+            tabs = [
+                {
+                    "url": url,
+                    "title": data.last_title,
+                    "total_time": data.total_seconds,
+                    "visits": data.visits
+                }
+                for url, data in self.tab_usage.items()
+            ]
+            self._tabs_cache = (version, tabs)
+        return self._tabs_cache[1]
 
     def get_usage_detailed(self) -> Dict[str, Any]:
         """Return thread-safe copy of usage data + current status."""
+        # Reuse the timestamp string across rapid UI polls (stale by at most 250ms)
+        now = time.monotonic()
+        if now - self._last_updated_at > 0.25:
+            self._last_updated_iso = datetime.now().isoformat()
+            self._last_updated_at = now
+        last_updated = self._last_updated_iso
+        
         with self._lock:
             current_app = self.last_active_app or "Unknown"
-            classification = "neutral"
+            classification = _classify_app(current_app)
             
-            productive_apps = ["Visual Studio Code", "iTerm", "Terminal", "Notion", "Obsidian", "Figma", "Xcode", "Docker", "Python", "Cursor"]
-            distractor_apps = ["Messages", "Discord", "Slack", "Mail", "Spotify", "Maps", "Calendar", "Netflix", "YouTube"]
+            active_tab_url = self.last_active_tab_url if self.last_active_browser else None
             
-            if any(p.lower() in current_app.lower() for p in productive_apps):
-                classification = "productive"
-            elif any(d.lower() in current_app.lower() for d in distractor_apps):
-                classification = "distracting"
-                
             return {
-                "usage": {app: data.copy() for app, data in self.app_usage.items()},
-                "chrome_tabs": self.get_chrome_tabs_data(),
+                "usage": self._usage_snapshot_locked(),
+                "chrome_tabs": self._tabs_snapshot_locked(),
                 "current_status": {
                     "app": current_app,
-                    "active_tab_url": self.last_active_tab_url if ("Chrome" in current_app or "Brave" in current_app or "Arc" in current_app) else None,
+                    "active_tab_url": active_tab_url,
+                    "active_tab_distracting": bool(active_tab_url) and _is_distractor_url(active_tab_url),
                     "classification": classification,
-                    "last_updated": datetime.now().isoformat(),
+                    "last_updated": last_updated,
                     "permissions": {
                         "accessibility": self.has_accessibility_permission
                     }
@@ -548,15 +1042,27 @@ class DataCollectorAgent(BaseAgent):
     def get_chrome_tabs_data(self) -> List[Dict[str, Any]]:
         """Return formatted Chrome tab data."""
         with self._lock:
-            tabs = []
-            for url, data in self.tab_usage.items():
-                tabs.append({
-                    "url": url,
-                    "title": data["last_title"],
-                    "total_time": data["total_seconds"],
-                    "visits": data["visits"]
-                })
-            return tabs
+            return self._tabs_snapshot_locked()
+
+    def get_focus_snapshot(self, tab_limit: int = 5) -> Dict[str, Any]:
+        """
+        Active app and tab plus the tab_limit most recently used tabs, read
+        under one lock hold instead of copying the whole tab list.
+        """
+        with self._lock:
+            active_app = self.last_active_app or "Unknown"
+            active_url = self.last_active_tab_url or ""
+            tabs = [
+                {"url": url, "title": data.last_title}
+                for url, data in islice(reversed(self.tab_usage.items()), tab_limit)
+            ]
+        return {
+            "active_app": active_app,
+            "current_url": active_url,
+            "tabs": tabs,
+            "app_classification": _classify_app(active_app),
+            "url_distracting": bool(active_url) and _is_distractor_url(active_url)
+        }
 
     def get_context_switch_count(self) -> int:
         """Return the total number of context switches."""
@@ -1,13 +1,33 @@
+import asyncio
 import platform
+import re
 import subprocess
 import time
-import threading
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 from agents.base import BaseAgent
 from services.database_service import get_database_service
 from services.gamification_service import get_gamification_service
 from services.notification_service import get_notification_service
+from utils import spawn
+from utils.logs import get_logger
+
+logger = get_logger(__name__)
+
+_PLATFORM = platform.system()
+
+# Goal keywords per tool category, each one compiled case-insensitive
+# alternation (substring match, as before: "develop" also hits "developer")
+_CODING_GOAL_RE = re.compile("code|program|develop|app|api|backend|frontend", re.IGNORECASE)
+_WRITING_GOAL_RE = re.compile("write|blog|post|document", re.IGNORECASE)
+_DESIGN_GOAL_RE = re.compile("design|ui|ux|logo", re.IGNORECASE)
+
+def _tell_each(apps: List[str], command: str) -> str:
+    """AppleScript sending command to every app, each in its own try block."""
+    return "\n".join(
+        'try\ntell application "{}" to {}\nend try'.format(app.replace('"', '\\"'), command)
+        for app in apps
+    )
 
 class FlowAgent(BaseAgent):
     """
@@ -23,12 +43,13 @@ class FlowAgent(BaseAgent):
         
         self.is_flow_active = False
         self.flow_start_time = None
+        self._flow_start_mono = 0.0  # time.monotonic() at flow start, for the duration
         self.current_goal = None
         self.current_user_id = None
         
-        # Threading
-        self._flow_thread = None
-        self._stop_event = threading.Event()
+        # XP loop, a task on the main loop; _stop_event ends it early
+        self._flow_task: Optional[asyncio.Task] = None
+        self._stop_event: Optional[asyncio.Event] = None
         
         # System Whitelist (Apps that should NEVER be closed)
         self.system_whitelist = [
@@ -74,12 +95,14 @@ class FlowAgent(BaseAgent):
         3. Open missing tools
         4. Start XP Loop
         """
-        print(f"🌊 Entering Flow State for goal: {goal}")
+        logger.info("🌊 Entering Flow State for goal: %s", goal)
         self.is_flow_active = True
         self.flow_start_time = datetime.now()
+        self._flow_start_mono = time.monotonic()
         self.current_goal = goal
         self.current_user_id = user_id
         
+        # osascript calls below block for seconds, so they run off the event loop
         actions_taken = []
         
         # 1. Determine Allowed Apps
@@ -87,22 +110,24 @@ class FlowAgent(BaseAgent):
         goal_tools = self._get_tools_for_goal(goal)
         allowed_apps.update(goal_tools)
         
-        # 2. Close Non-Allowed Apps
-        closed_apps = self._close_non_allowed_apps(allowed_apps)
+        # 2. Close Non-Allowed Apps (case-insensitive substring match, one
+        # compiled alternation so each running app is scanned once)
+        allowed_re = re.compile("|".join(map(re.escape, allowed_apps)), re.IGNORECASE)
+        closed_apps = await asyncio.to_thread(self._close_non_allowed_apps, allowed_re)
         actions_taken.extend([f"Closed {app}" for app in closed_apps])
         
         # 3. Close Distracting Tabs (Always run this cleanup)
-        closed_tabs = self._close_distractor_tabs()
+        closed_tabs = await asyncio.to_thread(self._close_distractor_tabs)
         actions_taken.extend([f"Closed {tab}" for tab in closed_tabs])
         
         # 4. Open Productive Tools
-        opened_tools = self._open_tools(goal_tools)
+        opened_tools = await asyncio.to_thread(self._open_tools, goal_tools)
         actions_taken.extend([f"Opened {tool}" for tool in opened_tools])
         
-        # 5. Start Background Loop
-        self._stop_event.clear()
-        self._flow_thread = threading.Thread(target=self._flow_loop, daemon=True)
-        self._flow_thread.start()
+        # 5. Start Background Loop (replacing any left from a previous enter)
+        self._stop_flow_loop()
+        self._stop_event = asyncio.Event()
+        self._flow_task = asyncio.create_task(self._flow_loop(self._stop_event))
         
         return {
             "status": "flow_active",
@@ -116,9 +141,9 @@ class FlowAgent(BaseAgent):
         if not self.is_flow_active:
             return {"status": "not_active", "message": "Flow State is not active"}
             
-        print("🛑 Exiting Flow State")
+        logger.info("🛑 Exiting Flow State")
         self.is_flow_active = False
-        self._stop_event.set()
+        self._stop_flow_loop()
         
         duration = self._get_duration()
         
@@ -128,26 +153,34 @@ class FlowAgent(BaseAgent):
             "duration": duration
         }
 
-    def _flow_loop(self):
+    async def stop(self):
+        await super().stop()
+        self._stop_flow_loop()
+
+    def _stop_flow_loop(self):
+        """Wake the XP loop so it exits; it stops before awarding any more XP."""
+        if self._stop_event is not None:
+            self._stop_event.set()
+
+    async def _flow_loop(self, stop_event: asyncio.Event):
         """Background loop to award XP and maintain flow."""
-        print("🔄 Flow Loop Started")
+        logger.info("🔄 Flow Loop Started")
         minutes_passed = 0
         
-        while not self._stop_event.is_set():
-            # Wait 60 seconds (or check stop event every second)
-            for _ in range(60):
-                if self._stop_event.is_set():
-                    break
-                time.sleep(1)
-            
-            if self._stop_event.is_set():
+        while True:
+            # Wait 60 seconds; returns early as soon as flow is exited
+            try:
+                await asyncio.wait_for(stop_event.wait(), 60)
                 break
+            except asyncio.TimeoutError:
+                pass
                 
             # Award XP every minute
             minutes_passed += 1
             if self.current_user_id:
                 try:
-                    result = self.gamification.add_xp(
+                    result = await asyncio.to_thread(
+                        self.gamification.add_xp,
                         self.current_user_id, 
                         10, 
                         f"Flow State: {minutes_passed} min"
@@ -155,72 +188,68 @@ class FlowAgent(BaseAgent):
                     
                     if result.get("leveled_up"):
                         level = result.get("new_level")
-                        self.notifier.send_notification(
+                        await asyncio.to_thread(
+                            self.notifier.send_notification,
                             "🎉 Level Up!", 
                             f"Congratulations! You've reached Level {level}!",
                             sound="Fanfare"
                         )
                     
-                    print(f"✨ Awarded 10 XP to {self.current_user_id}. Total: {result.get('new_total_xp')}")
+                    logger.info("✨ Awarded 10 XP to %s. Total: %s", self.current_user_id, result.get('new_total_xp'))
                     
                 except Exception as e:
-                    print(f"Error awarding XP: {e}")
+                    logger.error("Error awarding XP: %s", e)
 
     def _get_duration(self) -> int:
         """Get duration in minutes."""
         if not self.flow_start_time:
             return 0
-        delta = datetime.now() - self.flow_start_time
-        return int(delta.total_seconds() / 60)
+        return int((time.monotonic() - self._flow_start_mono) / 60)
 
-    def _close_non_allowed_apps(self, allowed_apps: set) -> List[str]:
-        """Close all running apps NOT in the allowed list."""
-        if platform.system() != "Darwin":
+    def _close_non_allowed_apps(self, allowed_re: "re.Pattern[str]") -> List[str]:
+        """Close all running apps NOT matching the allowed-apps pattern."""
+        if _PLATFORM != "Darwin":
             return []
             
         closed = []
         try:
             # Get list of all visible running apps
             script = 'tell application "System Events" to get name of every process where background only is false'
-            result = subprocess.run(["osascript", "-e", script], capture_output=True, text=True)
+            result = spawn.run([spawn.OSASCRIPT, "-e", script], capture_output=True)
             
             if result.returncode == 0:
-                running_apps = [app.strip() for app in result.stdout.split(",")]
+                running_apps = [app.strip() for app in result.stdout.decode("utf-8", "replace").split(",")]
                 
                 for app in running_apps:
                     # Check if app is allowed (case-insensitive)
-                    is_allowed = False
-                    for allowed in allowed_apps:
-                        if allowed.lower() in app.lower():
-                            is_allowed = True
-                            break
-                    
-                    if not is_allowed:
-                        print(f"🚫 Closing non-allowed app: {app}")
-                        try:
-                            quit_script = f'tell application "{app}" to quit'
-                            subprocess.run(["osascript", "-e", quit_script], capture_output=True, text=True)
-                            closed.append(app)
-                        except Exception as e:
-                            print(f"Error closing {app}: {e}")
+                    if not allowed_re.search(app):
+                        logger.info("🚫 Closing non-allowed app: %s", app)
+                        closed.append(app)
+                
+                # Quit them all from one osascript; try blocks keep one
+                # failing app from stopping the rest
+                if closed:
+                    try:
+                        spawn.run([spawn.OSASCRIPT, "-e", _tell_each(closed, "quit")], capture_output=True)
+                    except Exception as e:
+                        logger.error("Error closing apps: %s", e)
                             
         except Exception as e:
-            print(f"Error getting running apps: {e}")
+            logger.error("Error getting running apps: %s", e)
             
         return closed
 
     def _get_tools_for_goal(self, goal: str) -> List[str]:
         """Determine tools needed for the goal."""
         tools = []
-        goal_lower = goal.lower()
         
-        if any(w in goal_lower for w in ["code", "program", "develop", "app", "api", "backend", "frontend"]):
+        if _CODING_GOAL_RE.search(goal):
             tools.extend(self.productive_tools["coding"])
             
-        if any(w in goal_lower for w in ["write", "blog", "post", "document"]):
+        if _WRITING_GOAL_RE.search(goal):
             tools.extend(self.productive_tools["writing"])
             
-        if any(w in goal_lower for w in ["design", "ui", "ux", "logo"]):
+        if _DESIGN_GOAL_RE.search(goal):
             tools.extend(self.productive_tools["design"])
             
         return tools
@@ -234,15 +263,24 @@ class FlowAgent(BaseAgent):
 
     def _open_tools(self, tools: List[str]) -> List[str]:
         """Open the specified tools."""
-        if platform.system() != "Darwin":
+        if _PLATFORM != "Darwin":
             return []
             
-        opened = []
+        # Launch every 'open -a' at once and then wait, rather than one after
+        # another. (AppleScript 'activate' would batch further but prompts
+        # "Where is ...?" for tools that are not installed.)
+        launched = []
         for tool in tools:
             try:
-                # Check if already running first? 
                 # 'open -a' usually brings to front if running, which is good.
-                subprocess.run(["open", "-a", tool], capture_output=True)
+                launched.append((tool, spawn.popen([spawn.OPEN, "-a", tool], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)))
+            except Exception:
+                pass
+        
+        opened = []
+        for tool, proc in launched:
+            try:
+                proc.wait(timeout=10)
                 opened.append(tool)
             except Exception:
                 pass
@@ -4,30 +4,54 @@ Morning Briefing Agent - Generates a daily summary and strategy.
 Analyzes yesterday's performance and generates a personalized briefing for the user.
 """
 
-from typing import Any, Dict, Optional
-from datetime import datetime, timedelta
-from agents.base import BaseAgent
-from services.openai_service import get_openai_service
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+from datetime import date, timedelta
+from agents.base import LLMAgent
 from services.database_service import get_database_service
+from utils.logs import get_logger
 
-class MorningBriefingAgent(BaseAgent):
+logger = get_logger(__name__)
+
+# Static briefing prompt; only the client fields are filled in per call
+_BRIEFING_TEMPLATE = """You are an elite productivity coach. Generate a "Morning Briefing" for your client.
+
+CLIENT PROFILE:
+- Current Goal: {goal_text}
+- Level: {level} (XP: {xp})
+
+YESTERDAY'S PERFORMANCE:
+- Focus Time: {focus_minutes} minutes
+- Distractions: {distraction_minutes} minutes lost
+- Success Rate: {success_rate}%
+
+Generate a JSON response with:
+1. "greeting": A short, motivating greeting acknowledging their level/status.
+2. "summary": 1-2 sentences analyzing yesterday's performance. Be specific but encouraging.
+3. "focus_areas": List of 3 specific, actionable things to focus on today to reach their goal.
+4. "quote": A short, relevant inspirational quote.
+
+Tone: Professional, encouraging, elite but empathetic. Not robotic.
+
+JSON Structure:
+{{
+    "greeting": "Good morning...",
+    "summary": "Yesterday you...",
+    "focus_areas": ["Task 1", "Task 2", "Task 3"],
+    "quote": "..."
+}}"""
+
+class MorningBriefingAgent(LLMAgent):
     """
     Agent that generates a daily morning briefing.
     """
     
-    def __init__(self):
-        super().__init__("MorningBriefingAgent")
-        self.openai = None
+    def __init__(self, llm_service=None):
+        super().__init__("MorningBriefingAgent", llm_service)
         self.db = get_database_service()
-
-    async def start(self):
-        """Initialize OpenAI service on start."""
-        await super().start()
-        try:
-            self.openai = get_openai_service()
-            print(f"✅ {self.name} initialized with OpenAI")
-        except Exception as e:
-            print(f"⚠️ Warning: {self.name} could not initialize OpenAI: {e}")
+        self._yesterday: tuple = (None, "")  # (day it was computed on, yesterday as YYYY-MM-DD)
+        # user_id -> ((day, prompt), briefing): the last briefing generated for each user
+        self._briefings: Dict[str, Tuple[Tuple[date, str], Dict]] = {}
 
     async def process(self, input_data: Any) -> Any:
         """
@@ -44,43 +68,36 @@ class MorningBriefingAgent(BaseAgent):
         if not self.openai:
             return self._get_placeholder_response()
             
-        # Get real metrics
-        yesterday_metrics = self._get_yesterday_metrics(user_id)
-        user_stats = self.db.get_user_stats(user_id)
+        # Get real metrics: two independent SQLite reads, run together off
+        # the event loop
+        yesterday_metrics, user_stats = await asyncio.gather(
+            asyncio.to_thread(self._get_yesterday_metrics, user_id),
+            asyncio.to_thread(self.db.get_user_stats, user_id)
+        )
         
         try:
-            prompt = f"""You are an elite productivity coach. Generate a "Morning Briefing" for your client.
-
-CLIENT PROFILE:
-- Current Goal: {goal.get('goal_text', 'Improve productivity') if goal else 'Improve productivity'}
-- Level: {user_stats.get('level', 1)} (XP: {user_stats.get('xp', 0)})
-
-YESTERDAY'S PERFORMANCE:
-- Focus Time: {yesterday_metrics.get('focus_minutes', 0)} minutes
-- Distractions: {yesterday_metrics.get('distraction_minutes', 0)} minutes lost
-- Success Rate: {yesterday_metrics.get('success_rate', 0)}%
-
-Generate a JSON response with:
-1. "greeting": A short, motivating greeting acknowledging their level/status.
-2. "summary": 1-2 sentences analyzing yesterday's performance. Be specific but encouraging.
-3. "focus_areas": List of 3 specific, actionable things to focus on today to reach their goal.
-4. "quote": A short, relevant inspirational quote.
+            prompt = _BRIEFING_TEMPLATE.format(
+                goal_text=goal.get('goal_text', 'Improve productivity') if goal else 'Improve productivity',
+                level=user_stats.get('level', 1),
+                xp=user_stats.get('xp', 0),
+                focus_minutes=yesterday_metrics.get('focus_minutes', 0),
+                distraction_minutes=yesterday_metrics.get('distraction_minutes', 0),
+                success_rate=yesterday_metrics.get('success_rate', 0)
+            )
 
-Tone: Professional, encouraging, elite but empathetic. Not robotic.
-
-JSON Structure:
-{{
-    "greeting": "Good morning...",
-    "summary": "Yesterday you...",
-    "focus_areas": ["Task 1", "Task 2", "Task 3"],
-    "quote": "..."
-}}"""
+            # Same day and same inputs (the dashboard re-requests it on every
+            # load): hand back the briefing already generated
+            key = (date.today(), prompt)
+            cached = self._briefings.get(user_id)
+            if cached is not None and cached[0] == key:
+                return cached[1]
 
             response = await self.openai.generate_structured_content(prompt, temperature=0.7)
+            self._briefings[user_id] = (key, response)
             return response
             
         except Exception as e:
-            print(f"❌ Error generating briefing: {e}")
+            logger.error("❌ Error generating briefing: %s", e)
             return self._get_placeholder_response()
     
     def _get_yesterday_metrics(self, user_id: str) -> Dict:
@@ -88,15 +105,9 @@ JSON Structure:
         Get metrics for yesterday from the database.
         """
         try:
-            # Get stats for the last 2 days to find yesterday
-            stats = self.db.get_daily_stats(user_id, days=2)
-            
-            # Find yesterday's entry
-            yesterday_str = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d')
-            
-            for entry in stats:
-                if entry.get('date') == yesterday_str:
-                    return entry
+            entry = self.db.get_stats_for_date(user_id, self._yesterday_str())
+            if entry:
+                return entry
             
             # If no data for yesterday, return empty/defaults
             return {
@@ -106,9 +117,16 @@ JSON Structure:
             }
             
         except Exception as e:
-            print(f"Error fetching yesterday's metrics: {e}")
+            logger.error("Error fetching yesterday's metrics: %s", e)
             return {}
 
+    def _yesterday_str(self) -> str:
+        """Yesterday's date string, recomputed only when the day rolls over."""
+        today = date.today()
+        if self._yesterday[0] != today:
+            self._yesterday = (today, (today - timedelta(days=1)).isoformat())
+        return self._yesterday[1]
+
     def _get_placeholder_response(self) -> Dict:
         return {
             "greeting": "Good morning! Ready to conquer the day?",
@@ -1,30 +1,79 @@
-from typing import Any, Dict, List
-from agents.base import BaseAgent
-from services.openai_service import get_openai_service
+import hashlib
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from agents.base import LLMAgent
 from services.database_service import get_database_service
-import json
+from utils.analysis import analyze_tab_usage, format_app_usage
 from datetime import date
+from functools import lru_cache
+from utils.logs import get_logger
 
-class ProbabilityAgent(BaseAgent):
+logger = get_logger(__name__)
+
+# A recalculation whose inputs match the last one to the minute, within this
+# window, reuses that result instead of calling the LLM again
+RESULT_REUSE_SECONDS = 300
+
+# Static instructions, sent as the system message so every call shares the
+# same prefix; the user message carries only the per-call data
+_PROBABILITY_SYSTEM_PROMPT = """You are an expert in goal achievement analysis and behavioral psychology. Output JSON.
+
+Analyze the likelihood of success for the user's goal based on their current activity patterns and recent history.
+
+The metrics are what the system has tracked automatically. Sparse data means the user hasn't been active on the computer or tracking just started: do not assume they are "doing nothing", say the *tracked* data is limited. Do not invent activities not listed.
+
+Calculate:
+1. A probability score (0.0 to 1.0) representing likelihood of success for the goal
+2. Key positive factors that increase success probability (focus on activities relevant to the goal)
+3. Key negative factors or challenges that decrease success probability (focus on distractions and lack of productive activity)
+4. A clear, actionable explanation of the assessment specific to this goal
+5. A trend assessment (improving, declining, stable) based on history
+
+Consider: time on sites/activities relevant to this goal (highly positive), learning and skill development (positive), entertainment sites (negative), high context switching during work hours (negative), consistent daily activity (positive), upward probability trend (positive).
+
+Return a JSON object with this structure:
+{
+    "score": 0.75,
+    "explanation": "A short, 2-sentence summary of the assessment.",
+    "positive_factors": ["Concise factor 1", "Concise factor 2"],
+    "negative_factors": ["Concise challenge 1", "Concise challenge 2"],
+    "confidence": "high/medium/low",
+    "trend": "improving/declining/stable"
+}"""
+
+# Per-call data; only the summaries are filled in
+_PROBABILITY_TEMPLATE = """GOAL INFORMATION:
+{goal_summary}
+
+USER ACTIVITY METRICS (TODAY):
+{metrics_summary}
+
+CHROME TAB ANALYSIS (TODAY):
+{tab_summary}
+
+CONTEXT SWITCHES (TODAY): {context_switches}
+
+HISTORICAL PERFORMANCE (LAST 7 DAYS):
+{history_summary}"""
+
+@lru_cache(maxsize=32)
+def _goal_summary(goal: str, skills: tuple, weeks: Any) -> str:
+    """Goal block of the prompt; the same goal comes back on every recalculation."""
+    return f"""Goal: {goal}
+Required Skills: {', '.join(skills)}
+Estimated Timeline: {weeks} weeks"""
+
+class ProbabilityAgent(LLMAgent):
     """
     Agent responsible for calculating the probability of goal success.
     Analyzes user metrics against goal requirements using OpenAI.
     """
     
-    def __init__(self):
-        super().__init__("ProbabilityAgent")
+    def __init__(self, llm_service=None):
+        super().__init__("ProbabilityAgent", llm_service)
         self.current_probability = 0.0
-        self.openai = None
         self.db = get_database_service()
-
-    async def start(self):
-        """Initialize OpenAI service on start."""
-        await super().start()
-        try:
-            self.openai = get_openai_service()
-            print(f"✅ {self.name} initialized with OpenAI")
-        except Exception as e:
-            print(f"⚠️ Warning: {self.name} could not initialize OpenAI: {e}")
+        self._last_results: Dict[Any, Tuple[str, Dict, float]] = {}  # user_id -> (inputs hash, response, monotonic time)
 
     async def process(self, input_data: Any) -> Any:
         """
@@ -43,10 +92,18 @@ class ProbabilityAgent(BaseAgent):
         context_switches = input_data.get("context_switches", 0)
         
         if not self.openai:
-            print("⚠️ OpenAI not available, returning placeholder data")
+            logger.warning("⚠️ OpenAI not available, returning placeholder data")
             return self._get_placeholder_response()
         
         try:
+            # Minute-level changes (one more tick on the same app) don't move the
+            # assessment, so reuse a recent result for the same coarse inputs
+            inputs_hash = self._inputs_hash(goal_analysis, user_metrics, tab_analysis, context_switches)
+            last = self._last_results.get(user_id)
+            if last and last[0] == inputs_hash and time.monotonic() - last[2] < RESULT_REUSE_SECONDS:
+                self.current_probability = last[1].get("score", 0.5)
+                return last[1]
+            
             # Fetch historical stats
             history = []
             if user_id:
@@ -55,59 +112,30 @@ class ProbabilityAgent(BaseAgent):
             # Format user metrics for the prompt
             metrics_summary = self._format_metrics(user_metrics)
             goal_summary = self._format_goal(goal_analysis)
-            tab_summary = self._format_tab_analysis(tab_analysis) if tab_analysis else "No tab data available."
+            # Raw per-URL usage is analyzed once, for both the prompt and the saved stats
+            analyzed = None
+            if isinstance(tab_analysis, dict) and any("total_seconds" in v for v in tab_analysis.values() if isinstance(v, dict)):
+                analyzed = analyze_tab_usage(tab_analysis)
+            tab_summary = self._format_tab_analysis(tab_analysis, analyzed) if tab_analysis else "No tab data available."
             history_summary = self._format_history(history)
             
-            prompt = f"""You are an expert in goal achievement analysis and behavioral psychology. 
+            prompt = _PROBABILITY_TEMPLATE.format(
+                goal_summary=goal_summary,
+                metrics_summary=metrics_summary,
+                tab_summary=tab_summary,
+                context_switches=context_switches,
+                history_summary=history_summary
+            )
 
-Analyze the likelihood of success for this user's goal based on their current activity patterns and recent history.
-
-GOAL INFORMATION:
-{goal_summary}
-
-USER ACTIVITY METRICS (TODAY):
-{metrics_summary}
-
-CHROME TAB ANALYSIS (TODAY):
-{tab_summary}
-
-CONTEXT SWITCHES (TODAY): {context_switches}
-
-HISTORICAL PERFORMANCE (LAST 7 DAYS):
-{history_summary}
-
-IMPORTANT CONTEXT:
-- The metrics above are what the system has automated tracked.
-- If data seems sparse, it means the user hasn't been active on the computer, or the tracking just started.
-- DO NOT assume the user is "doing nothing" if the tracked time is low; simply state that based on *tracked* activity, the data is limited.
-- Do not invent or hallucinate activities not listed.
-
-Based on this information, calculate:
-1. A probability score (0.0 to 1.0) representing likelihood of success for the goal: "{goal_summary}"
-2. Key positive factors that increase success probability (focus on activities relevant to the goal)
-3. Key negative factors or challenges that decrease success probability (focus on distractions and lack of productive activity)
-4. A clear, actionable explanation of the assessment specific to this goal
-5. A trend assessment (improving, declining, stable) based on history
-
-Consider:
-- Time spent on relevant sites and activities for this specific goal is highly positive
-- Time spent on learning and skill development is positive
-- Time spent on entertainment sites is negative
-- High context switching during work hours is negative
-- Consistent daily activity is positive
-- Upward trend in probability is positive
-
-Return your response as a JSON object with this structure:
-{{
-    "score": 0.75,
-    "explanation": "A short, 2-sentence summary of the assessment.",
-    "positive_factors": ["Concise factor 1", "Concise factor 2"],
-    "negative_factors": ["Concise challenge 1", "Concise challenge 2"],
-    "confidence": "high/medium/low",
-    "trend": "improving/declining/stable"
-}}"""
-
-            response = await self.openai.generate_structured_content(prompt, temperature=0.5)
+            # Stream the response: "score" comes first in the schema, so
+            # current_probability is up to date before the explanation and
+            # factor lists finish generating
+            response: Dict[str, Any] = {}
+            async for response in self.openai.generate_structured_content_stream(
+                prompt, temperature=0.5, system_prompt=_PROBABILITY_SYSTEM_PROMPT
+            ):
+                if "score" in response:
+                    self.current_probability = response["score"]
             
             # Store the probability
             self.current_probability = response.get("score", 0.5)
@@ -119,10 +147,7 @@ Return your response as a JSON object with this structure:
                 distraction_minutes = 0
                 if tab_analysis:
                      # Calculate using the same logic as format, or simplistic if raw
-                     if isinstance(tab_analysis, dict) and any("total_seconds" in v for v in tab_analysis.values() if isinstance(v, dict)):
-                         # Re-analyze just for stats saving (inefficient but safe)
-                         from utils.analysis import analyze_tab_usage
-                         analyzed = analyze_tab_usage(tab_analysis)
+                     if analyzed is not None:
                          focus_minutes = int(analyzed["productive_time"] / 60)
                          distraction_minutes = int(analyzed["distraction_time"] / 60)
                      else: 
@@ -138,50 +163,61 @@ Return your response as a JSON object with this structure:
                 }
                 self.db.save_daily_stats(user_id, stats)
             
+            self._last_results[user_id] = (inputs_hash, response, time.monotonic())
             return response
             
         except Exception as e:
-            print(f"❌ Error calculating probability with OpenAI: {e}")
+            logger.error("❌ Error calculating probability with OpenAI: %s", e)
             return self._get_placeholder_response()
     
+    def _inputs_hash(self, goal_analysis: Dict, metrics: Dict, tab_analysis: Dict, context_switches: Any) -> str:
+        """
+        Hash of the prompt inputs at whole-minute resolution.
+        History is left out: it only changes through this agent's own saves.
+        """
+        usage = metrics.get("usage", metrics) if isinstance(metrics, dict) else {}
+        tabs = tab_analysis if isinstance(tab_analysis, dict) else {}
+        key = (
+            self._format_goal(goal_analysis),
+            sorted(
+                (app, round(data.get("total_seconds", 0) / 60))
+                for app, data in usage.items() if isinstance(data, dict)
+            ),
+            sorted(
+                (url, round(data.get("total_seconds", 0) / 60) if isinstance(data, dict) else round(data / 60))
+                for url, data in tabs.items() if isinstance(data, (dict, int, float))
+            ),
+            context_switches
+        )
+        return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).hexdigest()
+    
     def _format_metrics(self, metrics: Dict) -> str:
         """Format user metrics for the prompt."""
-        if not metrics:
-            return "No activity data available yet."
-        
-        lines = []
-        for app, data in metrics.items():
-            visits = data.get("visits", 0)
-            time_seconds = data.get("total_seconds", 0)
-            time_minutes = time_seconds / 60
-            lines.append(f"- {app}: {visits} sessions, {time_minutes:.1f} minutes total")
-        
-        return "\n".join(lines) if lines else "No activity data available yet."
+        return format_app_usage(metrics) or "No activity data available yet."
     
     def _format_goal(self, goal_analysis: Dict) -> str:
         """Format goal analysis for the prompt."""
         if not goal_analysis:
             return "No goal information available."
         
-        goal = goal_analysis.get("goal", "Unknown goal")
-        skills = goal_analysis.get("skills", [])
-        weeks = goal_analysis.get("estimated_weeks", "Unknown")
-        
-        return f"""Goal: {goal}
-Required Skills: {', '.join(skills)}
-Estimated Timeline: {weeks} weeks"""
+        args = (
+            goal_analysis.get("goal", "Unknown goal"),
+            tuple(goal_analysis.get("skills", [])),
+            goal_analysis.get("estimated_weeks", "Unknown")
+        )
+        try:
+            return _goal_summary(*args)
+        except TypeError:
+            return _goal_summary.__wrapped__(*args)  # Unhashable field from the LLM
     
-    def _format_tab_analysis(self, tab_analysis: Dict) -> str:
-        """Format tab analysis for the prompt."""
+    def _format_tab_analysis(self, tab_analysis: Dict, analyzed: Optional[Dict] = None) -> str:
+        """Format tab analysis for the prompt (analyzed: analyze_tab_usage result if the input was raw)."""
         if not tab_analysis:
             return "No tab analysis available."
         
         # Use simple formatting since input is now likely already analyzed or raw
-        # If it's raw usage dict:
-        from utils.analysis import analyze_tab_usage
-        if isinstance(tab_analysis, dict) and any("total_seconds" in v for v in tab_analysis.values() if isinstance(v, dict)):
-             # It's raw data, analyze it first
-             analyzed = analyze_tab_usage(tab_analysis)
+        if analyzed is not None:
+             # It was raw data, already analyzed by the caller
              job_time = analyzed["productive_time"] / 60
              distraction_time = analyzed["distraction_time"] / 60
              total_time = analyzed["total_time"] / 60
@@ -200,15 +236,11 @@ Total browsing time: {total_time:.1f} minutes"""
         if not history:
             return "No historical data available."
         
-        lines = []
-        for day in history:
-            date_str = day.get("date", "Unknown")
-            prob = day.get("success_probability", 0)
-            focus = day.get("focus_minutes", 0)
-            distract = day.get("distraction_minutes", 0)
-            lines.append(f"- {date_str}: Probability {prob}%, Focus {focus}m, Distraction {distract}m")
-        
-        return "\n".join(lines)
+        return "\n".join(
+            f"- {day.get('date', 'Unknown')}: Probability {day.get('success_probability', 0)}%, "
+            f"Focus {day.get('focus_minutes', 0)}m, Distraction {day.get('distraction_minutes', 0)}m"
+            for day in history
+        )
     def _get_placeholder_response(self) -> Dict:
         """Fallback response if Gemini is unavailable."""
         return {
@@ -1,27 +1,41 @@
-from typing import Any, Dict, List
-from agents.base import BaseAgent
-from services.openai_service import get_openai_service
+import hashlib
+from typing import Any, Dict, List, Optional
+from agents.base import LLMAgent
+from services.database_service import get_database_service
+from utils.logs import get_logger
 
-class ResearchAgent(BaseAgent):
+logger = get_logger(__name__)
+
+# Static goal-breakdown prompt; only the goal is filled in per call
+_RESEARCH_TEMPLATE = """You are a career and goal planning expert. Analyze the following user goal and provide a detailed breakdown.
+
+User Goal: "{goal_text}"
+
+Provide a structured analysis including:
+1. Core skills required
+2. Key milestones
+3. Estimated timeline (in weeks)
+4. Potential challenges
+
+Return your response as a JSON object with this structure:
+{{
+    "goal": "{goal_text}",
+    "skills": ["skill1", "skill2", ...],
+    "milestones": ["milestone1", "milestone2", ...],
+    "estimated_weeks": 12,
+    "challenges": ["challenge1", "challenge2", ...]
+}}"""
+
+class ResearchAgent(LLMAgent):
     """
     Agent responsible for researching and breaking down user goals.
     Uses OpenAI LLM to understand requirements and create roadmaps.
     """
     
-    def __init__(self):
-        super().__init__("ResearchAgent")
+    def __init__(self, llm_service=None):
+        super().__init__("ResearchAgent", llm_service)
         self.current_goal = None
-        self.roadmap = None
-        self.openai = None
-
-    async def start(self):
-        """Initialize OpenAI service on start."""
-        await super().start()
-        try:
-            self.openai = get_openai_service()
-            print(f"✅ {self.name} initialized with OpenAI")
-        except Exception as e:
-            print(f"⚠️ Warning: {self.name} could not initialize OpenAI: {e}")
+        self.db = get_database_service()
 
     async def process(self, input_data: Any) -> Any:
         """
@@ -37,42 +51,59 @@ class ResearchAgent(BaseAgent):
         """
         Analyze the goal using OpenAI LLM.
         """
-        print(f"🔍 Researching goal: {goal_text}")
+        logger.info("🔍 Researching goal: %s", goal_text)
         self.current_goal = goal_text
         
+        # Users often re-enter the same goal; reuse the stored roadmap
+        goal_hash = self._goal_hash(goal_text)
+        try:
+            cached = self.db.get_cached_roadmap(goal_hash)
+        except Exception as e:
+            logger.warning("⚠️ Roadmap cache lookup failed: %s", e)
+            cached = None
+        if cached:
+            logger.info("♻️ Using cached roadmap")
+            cached["goal"] = goal_text
+            return cached
+        
         if not self.openai:
-            print("⚠️ OpenAI not available, returning placeholder data")
+            logger.warning("⚠️ OpenAI not available, returning placeholder data")
             return self._get_placeholder_response(goal_text)
         
         try:
-            prompt = f"""You are a career and goal planning expert. Analyze the following user goal and provide a detailed breakdown.
-
-User Goal: "{goal_text}"
-
-Provide a structured analysis including:
-1. Core skills required
-2. Key milestones
-3. Estimated timeline (in weeks)
-4. Potential challenges
-
-Return your response as a JSON object with this structure:
-{{
-    "goal": "{goal_text}",
-    "skills": ["skill1", "skill2", ...],
-    "milestones": ["milestone1", "milestone2", ...],
-    "estimated_weeks": 12,
-    "challenges": ["challenge1", "challenge2", ...]
-}}"""
+            prompt = _RESEARCH_TEMPLATE.format(
+                goal_text=goal_text
+            )
 
             response = await self.openai.generate_structured_content(prompt, temperature=0.7)
             
-            self.roadmap = response
+            # Write-through: the roadmap table, not this instance, holds it
+            try:
+                self.db.save_cached_roadmap(goal_hash, response)
+            except Exception as e:
+                logger.warning("⚠️ Could not cache roadmap: %s", e)
             return response
             
         except Exception as e:
-            print(f"❌ Error analyzing goal with OpenAI: {e}")
+            logger.error("❌ Error analyzing goal with OpenAI: %s", e)
             return self._get_placeholder_response(goal_text)
     
+    @property
+    def roadmap(self) -> Optional[Dict[str, Any]]:
+        """Roadmap for the current goal, read from the DB so it survives restarts."""
+        if not self.current_goal:
+            return None
+        try:
+            return self.db.get_cached_roadmap(self._goal_hash(self.current_goal))
+        except Exception as e:
+            logger.warning("⚠️ Roadmap cache lookup failed: %s", e)
+            return None
+    
+    def _goal_hash(self, goal_text: str) -> str:
+        """Cache key: goal text lowercased with whitespace collapsed, hashed."""
+        normalized = " ".join(goal_text.lower().split())
+        return hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).hexdigest()
+    
     def _get_placeholder_response(self, goal_text: str) -> Dict:
         """Fallback response if OpenAI is unavailable."""
         return {
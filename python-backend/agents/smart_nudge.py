@@ -3,41 +3,71 @@ Smart Nudge Agent - AI-powered intervention system.
 Monitors user activity and uses MCP to intervene when off-track.
 """
 
-import time
 import threading
 import asyncio
-from typing import Dict, Any, Optional
-from datetime import datetime
+import random
+import time
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
 
-from agents.base import BaseAgent
+from agents.base import LLMAgent
 from services.database_service import get_database_service
 from services.mcp_service import get_mcp_service
-from utils.analysis import analyze_tab_usage, get_current_distractor, categorize_url
+from services.openai_service import get_openai_service
+from utils.logs import get_logger
+
+logger = get_logger(__name__)
+
+# How long a user's Smart Nudge on/off setting is trusted before re-reading it
+SETTINGS_CACHE_SECONDS = 60
+
+# Checks run every CHECK_INTERVAL_SECONDS while the user is off track; each
+# on-track (or idle) check doubles the wait, up to MAX_IDLE_CHECK_SECONDS
+CHECK_INTERVAL_SECONDS = 10
+MAX_IDLE_CHECK_SECONDS = 60
+
+# Each wait is shifted by up to this much either way, so checks don't stay
+# in lockstep with other periodic work
+CHECK_JITTER_SECONDS = 2
+
+# While the activity context is unchanged, an on-track analysis is reused
+# indefinitely and an off-track one for up to this long (so the level it
+# suggests gets re-assessed)
+ANALYSIS_REUSE_SECONDS = 300
 
-# Import Orchestrator globally to access DataCollector (circular import workaround)
-# In a cleaner architecture, DataCollector would be a service, but here we access it via global
-# We'll resolve it at runtime or pass it in.
+# How long stop() lets an in-flight check finish before cancelling it
+STOP_GRACE_SECONDS = 5
 
-class SmartNudgeAgent(BaseAgent):
+class SmartNudgeAgent(LLMAgent):
     """
     Autonomous agent that monitors focus and intervenes via MCP keys.
     """
     
-    def __init__(self):
-        super().__init__("SmartNudgeAgent")
+    def __init__(self, llm_service=None):
+        super().__init__("SmartNudgeAgent", llm_service)
         self.db = get_database_service()
         self.mcp = get_mcp_service()
         
         self.nudge_level = 0
-        self.last_nudge_time: Optional[datetime] = None
-        self.nudge_interval = 60 # Check every minute
+        self.last_nudge_times: Dict[str, float] = {}  # user_id -> time.monotonic() of their last nudge
+        self.nudge_interval = 60 # Minimum seconds between nudges
         self.active_nudge: Optional[str] = None # Current active nudge message
         
         # Dependencies
         self.data_collector = None 
         self.flow_agent = None
         
-        self._monitor_thread: Optional[threading.Thread] = None
+        self._monitor_task: Optional[asyncio.Task] = None
+        self._stop_event: Optional[asyncio.Event] = None  # Set by stop(); wakes the monitor loop out of its wait
+        self._last_analysis: Optional[Tuple[tuple, Dict, float]] = None  # (context key, LLM analysis, monotonic time)
+        self._check_lock = asyncio.Lock()  # Held while a check runs; overlapping triggers coalesce into it
+        self._last_check_off_track = False  # Result of the latest check, handed to coalesced callers
+        
+        # Nudge rows waiting for the DB, written once per monitor tick
+        self._nudge_buffer: List[Tuple[str, Optional[int], int, str, str]] = []
+        self._nudge_buffer_lock = threading.Lock()
+        
+        self._settings_cache: Dict[str, Tuple[float, bool]] = {}  # user_id -> (monotonic time read, enabled)
     
     def set_dependencies(self, data_collector, flow_agent=None):
         """Inject dependencies."""
@@ -55,79 +85,167 @@ class SmartNudgeAgent(BaseAgent):
         # Start MCP Service
         self.mcp.start()
         
-        # Start monitoring thread
-        self._monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        self._monitor_thread.start()
-        print("👀 Smart Nudge monitoring started")
+        # Seed the cooldowns so a restart doesn't re-nudge straight away
+        try:
+            await asyncio.to_thread(self._load_last_nudge_times)
+        except Exception as e:
+            logger.warning("⚠️ Could not load last nudge times: %s", e)
+        
+        # Monitor as a task on the main loop, where the shared OpenAI client's
+        # connection pool lives; blocking DB/MCP work goes to worker threads
+        self._stop_event = asyncio.Event()
+        self._monitor_task = asyncio.create_task(self._monitor_loop())
+        logger.info("👀 Smart Nudge monitoring started")
+
+    def _load_last_nudge_times(self):
+        """Convert every user's last stored nudge (UTC) to a monotonic time."""
+        now_utc = datetime.now(timezone.utc).replace(tzinfo=None)  # Stored timestamps are naive UTC
+        now = time.monotonic()
+        for user_id, ts in self.db.get_last_nudge_times().items():
+            self.last_nudge_times.setdefault(user_id, now - (now_utc - ts).total_seconds())
 
     async def stop(self):
         await super().stop()
+        if self._monitor_task is not None:
+            self._stop_event.set()
+            # Let a running check finish (and buffer its nudge) rather than
+            # abandoning it mid-way; wait_for cancels it if it overruns
+            try:
+                await asyncio.wait_for(self._monitor_task, STOP_GRACE_SECONDS)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+            self._monitor_task = None
+        await asyncio.to_thread(self._flush_nudges)
         self.mcp.stop()
 
-    def _monitor_loop(self):
-        """Background loop affecting checks every 60s."""
+    async def _monitor_loop(self):
+        """Background loop; checks back off while the user stays on track."""
+        on_track_streak = 0
         while self.is_running:
+            off_track = False
             try:
-                self._check_and_nudge()
+                off_track = await self._check_and_nudge()
+                await asyncio.to_thread(self._flush_nudges)
             except Exception as e:
-                print(f"❌ Error in Smart Nudge loop: {e}")
+                logger.error("❌ Error in Smart Nudge loop: %s", e)
             
-            time.sleep(10) # Check frequently (every 10s), but apply logic carefully
+            if off_track:
+                on_track_streak = 0
+                # No nudge can fire before the cooldown ends, so checking
+                # sooner would only spend an LLM call
+                user_id = self.data_collector.current_user_id if self.data_collector else None
+                delay = max(CHECK_INTERVAL_SECONDS, self._cooldown_remaining(user_id))
+            else:
+                delay = min(MAX_IDLE_CHECK_SECONDS, CHECK_INTERVAL_SECONDS * 2 ** min(on_track_streak, 3))
+                on_track_streak += 1
+            delay = max(1.0, delay + random.uniform(-CHECK_JITTER_SECONDS, CHECK_JITTER_SECONDS))
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), delay)
+                break
+            except asyncio.TimeoutError:
+                pass
 
-    def _check_and_nudge(self):
-        """Core logic to check state and trigger nudges using OpenAI."""
+    async def _check_and_nudge(self):
+        """
+        Run a check, unless one is already in flight (monitor tick or manual
+        trigger): then wait for that one instead of starting a second LLM call.
+        Returns True if the check found the user off track.
+        """
+        if self._check_lock.locked():
+            # The lock is FIFO, so it is acquired right after the in-flight
+            # check releases it, before anything else can overwrite its result
+            async with self._check_lock:
+                return self._last_check_off_track
+        async with self._check_lock:
+            self._last_check_off_track = False
+            self._last_check_off_track = await self._run_check()
+            return self._last_check_off_track
+
+    async def _run_check(self) -> bool:
+        """Core logic to check state and trigger nudges using OpenAI. Returns True if a nudge was needed."""
+        context = await asyncio.to_thread(self._gather_context)
+        if context is None:
+            return False
+        user_id, goal, activity_data, context_key = context
+        
+        # While the context is unchanged between checks, the previous verdict
+        # still applies and the LLM call is skipped
+        last = self._last_analysis
+        if last is not None and last[0] == context_key and (
+            not last[1].get("nudge_needed") or time.monotonic() - last[2] < ANALYSIS_REUSE_SECONDS
+        ):
+            analysis = last[1]
+            if analysis.get("nudge_needed"):
+                await asyncio.to_thread(self._handle_ai_nudge, analysis, goal, user_id)
+                return True
+            return False
+        
+        try:
+            # Analyze with OpenAI (resolved by start(); manual checks may come first)
+            llm = self.openai or get_openai_service()
+            analysis = await llm.analyze_context(goal, activity_data)
+            if not str(analysis.get("reason", "")).startswith("Analysis failed"):
+                self._last_analysis = (context_key, analysis, time.monotonic())
+            
+            if analysis.get("nudge_needed"):
+                await asyncio.to_thread(self._handle_ai_nudge, analysis, goal, user_id)
+                return True
+            else:
+                 # Decay logic
+                 pass 
+                 
+        except Exception as e:
+            logger.error("❌ Smart Nudge AI Error: %s", e)
+        return False
+
+    def _gather_context(self) -> Optional[Tuple[str, Dict, Dict, tuple]]:
+        """
+        Blocking part of a check: (user_id, goal, activity_data, context_key),
+        or None if there is nothing to check.
+        """
         if not self.data_collector:
-            return
+            return None
 
         # Get current user
         user_id = self.data_collector.current_user_id
         if not user_id:
-            return
+            return None
 
         # Check if enabled
-        if not self.db.get_nudge_settings(user_id):
-            return
+        if not self._nudges_enabled(user_id):
+            return None
 
         # Get active goal
         goal = self.db.get_current_goal(user_id)
         if not goal:
-            return
+            return None
 
-        # Prepare context for OpenAI
-        # We need "current state": Active App, URL, Tabs
-        chrome_tabs = self.data_collector.get_chrome_tabs_data()
+        # Current app, URL and the few most recent tabs the prompt shows,
+        # classified by the collector in the same read
+        activity_data = self.data_collector.get_focus_snapshot()
         
-        # Determine "current" activity based on what's active active
-        current_active_app = self.data_collector.last_active_app or "Unknown"
-        current_active_url = self.data_collector.last_active_tab_url or ""
-        
-        activity_data = {
-            "active_app": current_active_app,
-            "current_url": current_active_url,
-            "tabs": chrome_tabs
-        }
-        
-        # ASYNC CALL needs to be handled carefully in a sync thread loop.
-        import asyncio
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            from services.openai_service import get_openai_service
-            openai_service = get_openai_service()
-            
-            # Analyze with OpenAI
-            analysis = loop.run_until_complete(openai_service.analyze_context(goal, activity_data))
-            
-            if analysis.get("nudge_needed"):
-                self._handle_ai_nudge(analysis, goal, user_id)
-            else:
-                 # Decay logic
-                 pass 
-                 
-        except Exception as e:
-            print(f"❌ Smart Nudge AI Error: {e}")
-        finally:
-            loop.close()
+        # Everything the analysis prompt sees
+        context_key = (
+            goal.get("goal_text"),
+            activity_data["active_app"],
+            activity_data["current_url"],
+            tuple(t["title"] for t in activity_data["tabs"])
+        )
+        return user_id, goal, activity_data, context_key
+
+    def _nudges_enabled(self, user_id: str) -> bool:
+        """The user's Smart Nudge setting, re-read from the DB at most every SETTINGS_CACHE_SECONDS."""
+        cached = self._settings_cache.get(user_id)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < SETTINGS_CACHE_SECONDS:
+            return cached[1]
+        enabled = self.db.get_nudge_settings(user_id)
+        self._settings_cache[user_id] = (now, enabled)
+        return enabled
+
+    def invalidate_settings(self, user_id: str):
+        """Drop the cached setting so the next check reads the new value."""
+        self._settings_cache.pop(user_id, None)
 
     def _handle_ai_nudge(self, analysis: Dict, goal: Dict, user_id: str):
         """Handle nudge based on AI Analysis."""
@@ -136,33 +254,50 @@ class SmartNudgeAgent(BaseAgent):
         action = analysis.get("suggested_action", "notify")
         
         # Check cooldown
-        if self.last_nudge_time:
-            elapsed = (datetime.now() - self.last_nudge_time).total_seconds()
-            if elapsed < 60: 
-                return
+        if self._cooldown_remaining(user_id) > 0:
+            return
 
         self.nudge_level = level
-        self.last_nudge_time = datetime.now()
+        self.last_nudge_times[user_id] = time.monotonic()
         self.active_nudge = reason # Update active nudge for polling
         
-        print(f"🤖 AI Nudge Triggered: {reason} (Level {level})")
+        logger.info("🤖 AI Nudge Triggered: %s (Level %s)", reason, level)
         
-        # Log to DB
-        self.db.save_nudge_event(user_id, goal.get("id"), level, reason)
+        # Log to DB (buffered; flushed after the check)
+        with self._nudge_buffer_lock:
+            self._nudge_buffer.append((user_id, goal.get("id"), level, reason, time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())))
         
         if level >= 3 or action == "close_tab":
-             self.mcp.send_notification("🤖 AI Intervention", f"{reason}. Closing tab to help you focus.")
-             # Close current tab if URL known
+             title, message = "🤖 AI Intervention", f"{reason}. Closing tab to help you focus."
+             # Close current tab if URL known, in the same round trip as the notification
              current_url = self.data_collector.last_active_tab_url
              if current_url:
-                 self.mcp.close_chrome_tab(current_url)
+                 self.mcp.notify_and_close_chrome_tab(title, message, current_url)
+             else:
+                 self.mcp.send_notification(title, message)
         else:
              self.mcp.send_notification("👋 Focus Check", f"{reason}")
 
+    def _cooldown_remaining(self, user_id: Optional[str]) -> float:
+        """Seconds until user_id may be nudged again (0 if they may be now)."""
+        last = self.last_nudge_times.get(user_id)
+        if last is None:
+            return 0.0
+        return max(0.0, self.nudge_interval - (time.monotonic() - last))
+
+    def _flush_nudges(self):
+        """Write buffered nudge events to the DB in one transaction."""
+        with self._nudge_buffer_lock:
+            batch, self._nudge_buffer = self._nudge_buffer, []
+        if batch:
+            self.db.save_nudge_events_bulk(batch)
+
     async def process(self, input_data: Any) -> Any:
         """
         Legacy process method compatible with Orchestrator.
         Can be used to force a check manualy.
         """
-        self._check_and_nudge()
+        await self._check_and_nudge()
+        if not self.is_running:
+            await asyncio.to_thread(self._flush_nudges)  # No monitor loop to flush it
         return {"status": "checked", "level": self.nudge_level}
@@ -1,25 +1,55 @@
 from typing import Any, Dict, List
-from agents.base import BaseAgent
-from services.openai_service import get_openai_service
+from agents.base import LLMAgent
+from utils.analysis import format_app_usage
+from utils.logs import get_logger
 
-class SuccessStrategyAgent(BaseAgent):
+logger = get_logger(__name__)
+
+# Static instructions and schema, sent as the system message so repeated
+# calls share a cacheable prefix; the user message carries only the summaries
+_STRATEGY_SYSTEM_PROMPT = """You are an expert productivity coach and strategy planner. Output JSON.
+
+Create a detailed, actionable success strategy for the user from their goal, success probability assessment and current activity patterns.
+
+Create a comprehensive strategy that includes:
+1. A weekly plan with specific focus areas for each week
+2. Daily task recommendations (what to do each day)
+3. Specific recommendations to improve success probability
+4. Time allocation suggestions based on current patterns
+
+Return your response as a JSON object with this structure:
+{
+    "weekly_plan": [
+        {"week": 1, "theme": "...", "days": [
+            {"day": 1, "focus": "...", "tasks": [{"task": "...", "type": "coding/learning/project", "estimated_minutes": 60}]}
+        ]}
+    ],
+    "recommendations": [
+        {"area": "...", "suggestion": "...", "impact": "high/medium/low"}
+    ],
+    "resources": [
+        {"title": "Resource Title", "url": "https://...", "type": "video/article/tool/course", "description": "Why this helps..."}
+    ]
+}"""
+
+# Per-call data; only the summaries are filled in
+_STRATEGY_TEMPLATE = """GOAL INFORMATION:
+{goal_summary}
+
+SUCCESS PROBABILITY ASSESSMENT:
+{probability_summary}
+
+CURRENT ACTIVITY PATTERNS:
+{metrics_summary}"""
+
+class SuccessStrategyAgent(LLMAgent):
     """
     Agent responsible for generating success strategies.
     Creates weekly plans and daily tasks using OpenAI.
     """
     
-    def __init__(self):
-        super().__init__("SuccessStrategyAgent")
-        self.openai = None
-
-    async def start(self):
-        """Initialize OpenAI service on start."""
-        await super().start()
-        try:
-            self.openai = get_openai_service()
-            print(f"✅ {self.name} initialized with OpenAI")
-        except Exception as e:
-            print(f"⚠️ Warning: {self.name} could not initialize OpenAI: {e}")
+    def __init__(self, llm_service=None):
+        super().__init__("SuccessStrategyAgent", llm_service)
 
     async def process(self, input_data: Any) -> Any:
         """
@@ -36,7 +66,7 @@ class SuccessStrategyAgent(BaseAgent):
         user_metrics = input_data.get("user_metrics", {})
         
         if not self.openai:
-            print("⚠️ OpenAI not available, returning placeholder data")
+            logger.warning("⚠️ OpenAI not available, returning placeholder data")
             return self._get_placeholder_response()
         
         try:
@@ -45,46 +75,20 @@ class SuccessStrategyAgent(BaseAgent):
             probability_summary = self._format_probability(probability)
             metrics_summary = self._format_metrics(user_metrics)
             
-            prompt = f"""You are an expert productivity coach and strategy planner.
-
-Create a detailed, actionable success strategy for this user.
-
-GOAL INFORMATION:
-{goal_summary}
-
-SUCCESS PROBABILITY ASSESSMENT:
-{probability_summary}
+            prompt = _STRATEGY_TEMPLATE.format(
+                goal_summary=goal_summary,
+                probability_summary=probability_summary,
+                metrics_summary=metrics_summary
+            )
 
-CURRENT ACTIVITY PATTERNS:
-{metrics_summary}
-
-Create a comprehensive strategy that includes:
-1. A weekly plan with specific focus areas for each week
-2. Daily task recommendations (what to do each day)
-3. Specific recommendations to improve success probability
-4. Time allocation suggestions based on current patterns
-
-Return your response as a JSON object with this structure:
-{{
-    "weekly_plan": [
-        {{"week": 1, "theme": "...", "days": [
-            {{"day": 1, "focus": "...", "tasks": [{{"task": "...", "type": "coding/learning/project", "estimated_minutes": 60}}]}}
-        ]}}
-    ],
-    "recommendations": [
-        {{"area": "...", "suggestion": "...", "impact": "high/medium/low"}}
-    ],
-    "resources": [
-        {{"title": "Resource Title", "url": "https://...", "type": "video/article/tool/course", "description": "Why this helps..."}}
-    ]
-}}"""
-
-            response = await self.openai.generate_structured_content(prompt, temperature=0.7)
+            response = await self.openai.generate_structured_content(
+                prompt, temperature=0.7, system_prompt=_STRATEGY_SYSTEM_PROMPT
+            )
             
             return response
             
         except Exception as e:
-            print(f"❌ Error generating strategy with OpenAI: {e}")
+            logger.error("❌ Error generating strategy with OpenAI: %s", e)
             return self._get_placeholder_response()
     
     def _format_goal(self, goal_analysis: Dict) -> str:
@@ -119,17 +123,7 @@ Challenges: {', '.join(negative) if negative else 'None identified'}"""
     
     def _format_metrics(self, metrics: Dict) -> str:
         """Format user metrics for the prompt."""
-        if not metrics:
-            return "No activity data available yet."
-        
-        lines = []
-        for app, data in metrics.items():
-            visits = data.get("visits", 0)
-            time_seconds = data.get("total_seconds", 0)
-            time_minutes = time_seconds / 60
-            lines.append(f"- {app}: {visits} sessions, {time_minutes:.1f} minutes total")
-        
-        return "\n".join(lines) if lines else "No activity data available yet."
+        return format_app_usage(metrics) or "No activity data available yet."
     
     def _get_placeholder_response(self) -> Dict:
         """Fallback response if Gemini is unavailable."""
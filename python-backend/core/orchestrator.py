@@ -8,6 +8,10 @@ from agents.smart_nudge import SmartNudgeAgent
 from agents.morning_briefing import MorningBriefingAgent
 from agents.flow_agent import FlowAgent
 from services.correlation_service import CorrelationService
+from services.database_service import get_database_service
+from utils.logs import get_logger
+
+logger = get_logger(__name__)
 
 class Orchestrator:
     """
@@ -45,14 +49,14 @@ class Orchestrator:
 
     async def start(self):
         """Start all agents."""
-        print("🚀 Starting Orchestrator...")
+        logger.info("🚀 Starting Orchestrator...")
         for agent in self.agents:
             await agent.start()
         self.system_state["is_active"] = True
 
     async def stop(self):
         """Stop all agents."""
-        print("🛑 Stopping Orchestrator...")
+        logger.info("🛑 Stopping Orchestrator...")
         for agent in self.agents:
             await agent.stop()
         self.system_state["is_active"] = False
@@ -63,38 +67,39 @@ class Orchestrator:
         Flow: User -> Orchestrator -> ResearchAgent -> ProbabilityAgent -> StrategyAgent
         Returns complete analysis with goal breakdown, probability, and strategy.
         """
-        print(f"🎯 New Goal Received: {goal_text}")
+        logger.info("🎯 New Goal Received: %s", goal_text)
         self.system_state["current_goal"] = goal_text
         
         try:
-            # Step 1: Research and analyze the goal
-            print("📊 Step 1: Analyzing goal with ResearchAgent...")
-            goal_analysis = await self.researcher.process(goal_text)
-            print(f"✅ Goal Analysis Complete: {goal_analysis.get('goal', 'N/A')}")
-            
-            # Step 2: Get current user metrics
-            print("📈 Step 2: Fetching user metrics...")
-            user_metrics = await self.data_collector.process("get_metrics")
-            print(f"✅ Retrieved metrics for {len(user_metrics)} applications")
+            # Steps 1 & 2 don't depend on each other: fetch metrics while the
+            # research LLM call is in flight
+            logger.info("📊 Step 1: Analyzing goal with ResearchAgent...")
+            logger.info("📈 Step 2: Fetching user metrics...")
+            goal_analysis, user_metrics = await asyncio.gather(
+                self.researcher.process(goal_text),
+                self.data_collector.process("get_metrics")
+            )
+            logger.info("✅ Goal Analysis Complete: %s", goal_analysis.get('goal', 'N/A'))
+            logger.info("✅ Retrieved metrics for %s applications", len(user_metrics))
             
             # Step 3: Calculate probability of success
-            print("🎲 Step 3: Calculating success probability...")
+            logger.info("🎲 Step 3: Calculating success probability...")
             probability_input = {
                 "goal_analysis": goal_analysis,
                 "user_metrics": user_metrics
             }
             probability = await self.probability_agent.process(probability_input)
-            print(f"✅ Probability calculated: {probability.get('score', 0):.0%}")
+            logger.info("✅ Probability calculated: %.0f%%", probability.get('score', 0) * 100)
             
             # Step 4: Generate success strategy
-            print("🗺️  Step 4: Generating success strategy...")
+            logger.info("🗺️  Step 4: Generating success strategy...")
             strategy_input = {
                 "goal_analysis": goal_analysis,
                 "probability": probability,
                 "user_metrics": user_metrics
             }
             strategy = await self.strategy_agent.process(strategy_input)
-            print(f"✅ Strategy generated with {len(strategy.get('weekly_plan', []))} weeks planned")
+            logger.info("✅ Strategy generated with %s weeks planned", len(strategy.get('weekly_plan', [])))
             
             # Return complete analysis
             complete_analysis = {
@@ -104,11 +109,11 @@ class Orchestrator:
                 "user_metrics": user_metrics
             }
             
-            print("🎉 Complete goal analysis finished!")
+            logger.info("🎉 Complete goal analysis finished!")
             return complete_analysis
             
         except Exception as e:
-            print(f"❌ Error in goal analysis workflow: {e}")
+            logger.error("❌ Error in goal analysis workflow: %s", e)
             # Return error response
             return {
                 "error": str(e),
@@ -138,7 +143,6 @@ class Orchestrator:
 
     async def get_user_stats(self, user_id: str):
         """Get user gamification stats."""
-        from services.database_service import get_database_service
         db = get_database_service()
         return db.get_user_stats(user_id)
 
@@ -36,6 +36,10 @@ def get_sqlite_connection() -> sqlite3.Connection:
         )
         # Enable foreign keys
         _sqlite_conn.execute("PRAGMA foreign_keys = ON")
+        # WAL so analytics writes don't block readers; NORMAL sync is safe under WAL
+        _sqlite_conn.execute("PRAGMA journal_mode = WAL")
+        _sqlite_conn.execute("PRAGMA synchronous = NORMAL")
+        _sqlite_conn.execute("PRAGMA temp_store = MEMORY")
         # Use row factory for dict-like access
         _sqlite_conn.row_factory = sqlite3.Row
         print(f"✅ SQLite client initialized: {_sqlite_path}")
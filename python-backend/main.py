@@ -21,6 +21,7 @@ import os
 import subprocess
 import json
 import glob
+import re
 
 # Import database clients and services
 from db import get_supabase_client, get_sqlite_connection, close_sqlite_connection
@@ -28,19 +29,25 @@ from services.analytics_service import init_analytics_table, create_analytics_ev
 from services.user_service import get_user_by_email, create_user
 from services.database_service import get_database_service
 from services.correlation_service import CorrelationService
+from services.notification_service import get_notification_service
+from services.openai_service import get_openai_service
+from utils import spawn
 from models.analytics import AnalyticsEventCreate, AnalyticsEventResponse
 from models.user import UserCreate
 from uuid import uuid4
 
+# Resolved once; platform checks below and in request handlers reuse it
+_PLATFORM = platform.system()
+
 # Platform-specific imports for window monitoring
-if platform.system() == "Darwin":  # macOS
+if _PLATFORM == "Darwin":  # macOS
     try:
         from AppKit import NSWorkspace
         MAC_AVAILABLE = True
     except ImportError:
         MAC_AVAILABLE = False
         print("Warning: AppKit not available. Install pyobjc: pip install pyobjc")
-elif platform.system() == "Windows":
+elif _PLATFORM == "Windows":
     try:
         import pygetwindow as gw
         WINDOWS_AVAILABLE = True
@@ -51,7 +58,7 @@ else:
     # Linux - using xdotool or similar would require additional setup
     MAC_AVAILABLE = False
     WINDOWS_AVAILABLE = False
-    print(f"Warning: Window monitoring not fully supported on {platform.system()}")
+    print(f"Warning: Window monitoring not fully supported on {_PLATFORM}")
 
 
 
@@ -148,12 +155,12 @@ def get_active_window():
     Platform specific implementation.
     """
     try:
-        if platform.system() == "Darwin":
+        if _PLATFORM == "Darwin":
             script = 'tell application "System Events" to get name of first application process whose frontmost is true'
             # Add timeout to prevent hanging if AppleScript blocks
-            result = subprocess.run(["osascript", "-e", script], capture_output=True, text=True, timeout=2)
+            result = spawn.run([spawn.OSASCRIPT, "-e", script], capture_output=True, text=True, timeout=2)
             return result.stdout.strip()
-        elif platform.system() == "Windows":
+        elif _PLATFORM == "Windows":
             # Placeholder for Windows implementation
             return "Unknown"
         else:
@@ -170,7 +177,7 @@ def get_active_chrome_tab():
     Get the URL and Title of the active Chrome tab using AppleScript.
     Only works on macOS.
     """
-    if platform.system() != "Darwin":
+    if _PLATFORM != "Darwin":
         return None, None
 
     script = """
@@ -182,7 +189,7 @@ def get_active_chrome_tab():
     """
     try:
         # Add timeout to prevent hanging
-        result = subprocess.run(["osascript", "-e", script], capture_output=True, text=True, timeout=2)
+        result = spawn.run([spawn.OSASCRIPT, "-e", script], capture_output=True, text=True, timeout=2)
         if result.returncode == 0 and result.stdout.strip():
             # Output format: "url, title"
             parts = result.stdout.strip().split(", ", 1)
@@ -220,7 +227,7 @@ def get_installed_applications() -> List[Dict[str, Any]]:
     Platform-specific implementation for macOS, Windows, and Linux.
     """
     apps = []
-    system = platform.system()
+    system = _PLATFORM
     
     try:
         if system == "Darwin":  # macOS
@@ -297,6 +304,9 @@ def get_installed_applications() -> List[Dict[str, Any]]:
                         (winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"),
                         (winreg.HKEY_CURRENT_USER, r"SOFTWARE\Microsoft\Windows\CurrentVersion\Uninstall"),
                     ]
+                    # Names found so far, kept as a set rather than rebuilding
+                    # a list of every app name for each registry entry
+                    known_names = {a["name"] for a in apps}
                     
                     for hkey, path in registry_paths:
                         try:
@@ -312,7 +322,8 @@ def get_installed_applications() -> List[Dict[str, Any]]:
                                         except (FileNotFoundError, OSError):
                                             install_location = None
                                         
-                                        if app_name and app_name not in [a["name"] for a in apps]:
+                                        if app_name and app_name not in known_names:
+                                            known_names.add(app_name)
                                             apps.append({
                                                 "name": app_name,
                                                 "path": install_location or "",
@@ -463,7 +474,7 @@ async def health_check():
     """Health check endpoint to confirm the server is running."""
     return HealthResponse(
         status="healthy",
-        platform=platform.system(),
+        platform=_PLATFORM,
         python_version=sys.version.split()[0]
     )
 
@@ -485,7 +496,7 @@ async def get_activity():
     
     return ActivityResponse(
         active_window=active_window,
-        platform=platform.system(),
+        platform=_PLATFORM,
         status="ok"
     )
 
@@ -516,7 +527,6 @@ async def get_activity_logs():
     """
     Get recent system activity logs (app switches, etc).
     """
-    from services.database_service import get_database_service
     db = get_database_service()
     
     # Get logs for current user (or all if no user context yet)
@@ -543,7 +553,7 @@ async def get_metrics():
     metrics = get_system_metrics()
     return {
         "metrics": metrics,
-        "platform": platform.system(),
+        "platform": _PLATFORM,
         "status": "ok"
     }
 
@@ -559,7 +569,7 @@ async def get_applications():
         return {
             "applications": apps,
             "count": len(apps),
-            "platform": platform.system(),
+            "platform": _PLATFORM,
             "status": "ok"
         }
     except Exception as e:
@@ -644,7 +654,7 @@ async def get_chrome_tabs():
     Only works on macOS.
     Includes usage stats (time and visits) for each tab.
     """
-    if platform.system() != "Darwin":
+    if _PLATFORM != "Darwin":
         return {"tabs": [], "error": "Only supported on macOS"}
         
     tabs_data = await orchestrator.get_chrome_tabs()
@@ -692,7 +702,6 @@ async def chat_with_coach(request: CoachingRequest):
     """
     Chat with the AI Life Coach.
     """
-    from services.openai_service import get_openai_service
     service = get_openai_service()
     
     # Construct prompt with context
@@ -784,6 +793,12 @@ class AnalyticsEventRequest(BaseModel):
     metadata: Optional[Dict[str, Any]] = None
 
 
+_ANALYTICS_EVENT_TYPES = frozenset(['page_view', 'button_click', 'route_change', 'custom'])
+
+# Metadata keys containing any of these words are dropped (one scan per key)
+_SENSITIVE_METADATA_KEY_RE = re.compile("password|token|secret|key|auth|credit|ssn|email", re.IGNORECASE)
+
+
 @app.post("/api/analytics/events", response_model=AnalyticsEventResponse)
 async def track_analytics_event(event: AnalyticsEventRequest):
     """
@@ -805,8 +820,7 @@ async def track_analytics_event(event: AnalyticsEventRequest):
             )
         
         # Validate event_type (basic validation - no sensitive data)
-        allowed_event_types = ['page_view', 'button_click', 'route_change', 'custom']
-        if event.event_type not in allowed_event_types:
+        if event.event_type not in _ANALYTICS_EVENT_TYPES:
             # Allow custom event types but log them
             if not event.event_type.startswith('custom_'):
                 print(f"Warning: Unknown event_type: {event.event_type}")
@@ -815,10 +829,8 @@ async def track_analytics_event(event: AnalyticsEventRequest):
         safe_metadata = {}
         if event.metadata:
             # Only allow safe keys, exclude sensitive patterns
-            sensitive_keys = ['password', 'token', 'secret', 'key', 'auth', 'credit', 'ssn', 'email']
             for key, value in event.metadata.items():
-                key_lower = key.lower()
-                if not any(sensitive in key_lower for sensitive in sensitive_keys):
+                if not _SENSITIVE_METADATA_KEY_RE.search(key):
                     # Limit metadata size
                     if len(str(value)) < 1000:  # Keep payload small
                         safe_metadata[key] = value
@@ -1213,12 +1225,37 @@ async def update_nudge_settings(settings_data: dict):
         raise HTTPException(status_code=400, detail="user_id is required")
     
     db_service.set_nudge_settings(user_id, enabled)
+    orchestrator.smart_nudge_agent.invalidate_settings(user_id)
     
     return {
         "status": "ok",
         "message": f"Smart Nudge {'enabled' if enabled else 'disabled'}"
     }
 
+def _site_pattern(sites: List[str]) -> "re.Pattern[str]":
+    """One case-insensitive alternation over the given domains."""
+    return re.compile("|".join(map(re.escape, sites)), re.IGNORECASE)
+
+# Site categories for the nudge check (polled by the frontend), compiled once
+_NUDGE_JOB_SITES_RE = _site_pattern(["linkedin.com", "indeed.com", "glassdoor.com"])
+_NUDGE_LEARNING_SITES_RE = _site_pattern(["leetcode.com", "coursera.org", "udemy.com"])
+_NUDGE_ENTERTAINMENT_SITES_RE = _site_pattern(["youtube.com", "netflix.com", "reddit.com"])
+
+def _category_pattern(categories: Dict[str, List[str]]) -> "re.Pattern[str]":
+    """One alternation over every category's domains; the group that matched names the category."""
+    return re.compile(
+        "|".join(f"(?P<{name}>{'|'.join(map(re.escape, sites))})" for name, sites in categories.items()),
+        re.IGNORECASE
+    )
+
+# Wider site categories for the probability endpoint; each tab falls in at
+# most one, decided by a single search
+_PROBABILITY_SITES_RE = _category_pattern({
+    "job": ["linkedin.com", "indeed.com", "glassdoor.com", "monster.com", "ziprecruiter.com", "hired.com", "angel.co", "wellfound.com"],
+    "learning": ["coursera.org", "udemy.com", "leetcode.com", "hackerrank.com", "codecademy.com", "freecodecamp.org", "udacity.com", "pluralsight.com", "educative.io", "stackoverflow.com", "github.com", "developer.mozilla.org", "w3schools.com"],
+    "entertainment": ["youtube.com", "netflix.com", "reddit.com", "twitter.com", "instagram.com", "facebook.com", "tiktok.com", "twitch.tv"]
+})
+
 @app.get("/api/nudge/check")
 async def check_nudge_status(user_id: str):
     """
@@ -1241,14 +1278,17 @@ async def check_nudge_status(user_id: str):
         app_metrics = await orchestrator.get_metrics()
         context_switches = await orchestrator.get_context_switches()
         
-        # Categorize tabs for analysis
-        job_sites = ["linkedin.com", "indeed.com", "glassdoor.com"]
-        learning_sites = ["leetcode.com", "coursera.org", "udemy.com"]
-        entertainment_sites = ["youtube.com", "netflix.com", "reddit.com"]
-        
-        job_time = sum(tab.get("total_time", 0) for tab in chrome_tabs if any(site in tab.get("url", "").lower() for site in job_sites))
-        learning_time = sum(tab.get("total_time", 0) for tab in chrome_tabs if any(site in tab.get("url", "").lower() for site in learning_sites))
-        entertainment_time = sum(tab.get("total_time", 0) for tab in chrome_tabs if any(site in tab.get("url", "").lower() for site in entertainment_sites))
+        # Categorize tabs for analysis: one pass, one regex search per category
+        job_time = learning_time = entertainment_time = 0
+        for tab in chrome_tabs:
+            url = tab.get("url", "")
+            time_spent = tab.get("total_time", 0)
+            if _NUDGE_JOB_SITES_RE.search(url):
+                job_time += time_spent
+            if _NUDGE_LEARNING_SITES_RE.search(url):
+                learning_time += time_spent
+            if _NUDGE_ENTERTAINMENT_SITES_RE.search(url):
+                entertainment_time += time_spent
         
         # Prepare metrics for nudge agent
         metrics = {
@@ -1292,16 +1332,15 @@ async def test_nudge(request: Dict[str, Any]):
         raise HTTPException(status_code=400, detail="user_id is required")
     
     try:
-        # Trigger a test notification via SmartNudgeAgent
-        # We'll access the method directly for testing
-        agent = orchestrator.smart_nudge_agent
+        # Trigger a test notification
+        notifier = get_notification_service()
         
         if level == 1:
-            agent._send_native_notification("👋 Test Nudge", "This is a gentle reminder to stay focused.")
+            notifier.send_notification("👋 Test Nudge", "This is a gentle reminder to stay focused.")
         elif level == 2:
-            agent._send_native_notification("⚠️ Test Warning", "This is a firm warning from your AI coach.")
+            notifier.send_notification("⚠️ Test Warning", "This is a firm warning from your AI coach.")
         else:
-            agent._send_native_notification("🤖 Test Intervention", "This is how an AI intervention would look.")
+            notifier.send_notification("🤖 Test Intervention", "This is how an AI intervention would look.")
             
         return {"status": "ok", "message": "Test notification sent"}
     except Exception as e:
@@ -1336,28 +1375,16 @@ async def calculate_success_probability(user_id: Optional[str] = None):
         # Get context switches
         context_switches = await orchestrator.get_context_switches()
         
-        # Categorize tabs
-        job_sites = ["linkedin.com", "indeed.com", "glassdoor.com", "monster.com", "ziprecruiter.com", "hired.com", "angel.co", "wellfound.com"]
-        learning_sites = ["coursera.org", "udemy.com", "leetcode.com", "hackerrank.com", "codecademy.com", "freecodecamp.org", "udacity.com", "pluralsight.com", "educative.io", "stackoverflow.com", "github.com", "developer.mozilla.org", "w3schools.com"]
-        entertainment_sites = ["youtube.com", "netflix.com", "reddit.com", "twitter.com", "instagram.com", "facebook.com", "tiktok.com", "twitch.tv"]
-        
-        job_time = 0
-        learning_time = 0
-        entertainment_time = 0
-        other_time = 0
-        
+        # Categorize tabs: the first site named in the URL decides its category
+        category_time = {"job": 0, "learning": 0, "entertainment": 0, None: 0}
         for tab in chrome_tabs:
-            url = tab.get("url", "").lower()
-            time_spent = tab.get("total_time", 0)
-            
-            if any(site in url for site in job_sites):
-                job_time += time_spent
-            elif any(site in url for site in learning_sites):
-                learning_time += time_spent
-            elif any(site in url for site in entertainment_sites):
-                entertainment_time += time_spent
-            else:
-                other_time += time_spent
+            match = _PROBABILITY_SITES_RE.search(tab.get("url", ""))
+            category_time[match.lastgroup if match else None] += tab.get("total_time", 0)
+        
+        job_time = category_time["job"]
+        learning_time = category_time["learning"]
+        entertainment_time = category_time["entertainment"]
+        other_time = category_time[None]
         
         total_time = job_time + learning_time + entertainment_time + other_time
         
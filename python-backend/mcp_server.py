@@ -5,11 +5,15 @@ Can be used by agents to perform actions like closing apps or sending notificati
 """
 
 import sys
+import os
 import json
-import subprocess
+import time
 import platform
 import logging
-from typing import Dict, Any, Optional
+import http.client
+from typing import Dict, Any, Optional, Tuple
+
+from utils import spawn
 
 # Configure logging
 logging.basicConfig(
@@ -19,14 +23,67 @@ logging.basicConfig(
 )
 logger = logging.getLogger("MCPServer")
 
+_PLATFORM = platform.system()
+
+# This server is already a long-lived helper process, so on macOS it runs
+# AppleScript in-process via NSAppleScript instead of forking osascript per call
+APPLESCRIPT_IN_PROCESS = False
+if _PLATFORM == "Darwin":
+    try:
+        from Foundation import NSAppleScript
+        APPLESCRIPT_IN_PROCESS = True
+    except ImportError:
+        pass
+
+# Apple event descriptor types of boolean results, which have no string value
+_BOOLEAN_DESCRIPTORS = {int.from_bytes(b"true", "big"): "true", int.from_bytes(b"fals", "big"): "false"}
+
+_NOTIFY_SCRIPT = 'display notification "{message}" with title "{title}" sound name "default"'
+
+_CLOSE_TAB_SCRIPT = '''
+tell application "Google Chrome"
+    set windowList to every window
+    repeat with w in windowList
+        set tabList to every tab of w
+        repeat with t in tabList
+            if URL of t contains "{url_part}" then
+                close t
+                return true
+            end if
+        end repeat
+    end repeat
+end tell
+return false
+'''
+
+# Chrome DevTools endpoint, present only when Chrome runs with
+# --remote-debugging-port. Tabs are then closed by target id over HTTP, with
+# no AppleScript walk over every tab; otherwise the script above is used.
+CHROME_DEBUG_HOST = "127.0.0.1"
+CHROME_DEBUG_PORT = int(os.getenv("CHROME_DEBUG_PORT", "9222"))
+CDP_RETRY_SECONDS = 60  # After a failed probe, skip DevTools for this long
+
+def _as_literal(value: str) -> str:
+    """Escape a value for use inside an AppleScript string literal."""
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+def _notify_script(title: str, message: str) -> str:
+    return _NOTIFY_SCRIPT.format(title=_as_literal(title), message=_as_literal(message))
+
+def _close_tab_script(url_part: str) -> str:
+    return _CLOSE_TAB_SCRIPT.format(url_part=_as_literal(url_part))
+
 class MCPServer:
     def __init__(self):
         self.tools = {
             "send_notification": self.send_notification,
             "close_chrome_tab": self.close_chrome_tab,
+            "notify_and_close_chrome_tab": self.notify_and_close_chrome_tab,
             "open_url": self.open_url,
             "eval_applescript": self.eval_applescript
         }
+        self._cdp_down_until = 0.0
+        self._cdp_conn: Optional[http.client.HTTPConnection] = None  # Kept alive across requests
 
     def run(self):
         """
@@ -88,69 +145,124 @@ class MCPServer:
     def send_notification(self, title: str, message: str) -> bool:
         """Send a native OS notification."""
         logger.info(f"Sending notification: {title} - {message}")
-        if platform.system() == "Darwin":
-            script = f'display notification "{message}" with title "{title}" sound name "default"'
-            return self._run_applescript(script)
+        if _PLATFORM == "Darwin":
+            return self._run_applescript(_notify_script(title, message))
         return False
 
     def close_chrome_tab(self, url_part: str) -> bool:
         """Close any Chrome tab containing the URL fragment."""
         logger.info(f"Closing Chrome tab with URL: {url_part}")
-        if platform.system() == "Darwin":
-            script = f'''
-            tell application "Google Chrome"
-                set windowList to every window
-                repeat with w in windowList
-                    set tabList to every tab of w
-                    repeat with t in tabList
-                        if URL of t contains "{url_part}" then
-                            close t
-                            return true
-                        end if
-                    end repeat
-                end repeat
-            end tell
-            return false
-            '''
+        closed = self._cdp_close_tab(url_part)
+        if closed is not None:
+            return closed
+        if _PLATFORM == "Darwin":
             # parse string result from applescript 'true'/'false'
-            return self._run_applescript(script)
+            return self._run_applescript(_close_tab_script(url_part))
         return False
 
+    def notify_and_close_chrome_tab(self, title: str, message: str, url_part: str) -> bool:
+        """Send a notification and close the matching Chrome tab in one script run."""
+        logger.info(f"Sending notification: {title} - {message}; closing Chrome tab with URL: {url_part}")
+        if _PLATFORM == "Darwin":
+            if self._cdp_close_tab(url_part) is not None:
+                return self._run_applescript(_notify_script(title, message))
+            script = _notify_script(title, message) + _close_tab_script(url_part)
+            return self._run_applescript(script)
+        return self._cdp_close_tab(url_part) or False
+
     def open_url(self, url: str) -> bool:
         """Open a URL in the default browser."""
         logger.info(f"Opening URL: {url}")
-        if platform.system() == "Darwin":
-            subprocess.run(["open", url])
+        if _PLATFORM == "Darwin":
+            spawn.run([spawn.OPEN, url])
             return True
         return False
         
     def eval_applescript(self, script: str) -> str:
         """Evaluate raw AppleScript (Use with caution)."""
-        if platform.system() == "Darwin":
-            result = subprocess.run(
-                ['osascript', '-e', script],
-                capture_output=True,
-                text=True
-            )
-            return result.stdout.strip()
+        if _PLATFORM == "Darwin":
+            ok, output = self._osascript(script, timeout=None)
+            return output if ok else ""
         return "Not supported on this OS"
 
     def _run_applescript(self, script: str) -> bool:
         """Helper to run simple AppleScript boolean commands."""
         try:
-            result = subprocess.run(
-                ['osascript', '-e', script],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
+            ok, output = self._osascript(script, timeout=5)
             # If command simply runs without error, we consider it success unless it returns 'false'
-            output = result.stdout.strip()
-            return result.returncode == 0 and output != "false"
+            return ok and output != "false"
         except Exception as e:
             logger.error(f"AppleScript error: {e}")
             return False
 
+    def _cdp_close_tab(self, url_part: str) -> Optional[bool]:
+        """
+        Close the first page target whose URL contains url_part via Chrome DevTools.
+        Returns None if the DevTools endpoint is unavailable.
+        """
+        if time.monotonic() < self._cdp_down_until:
+            return None
+        try:
+            targets = json.loads(self._cdp_get("/json/list"))
+            for target in targets:
+                if target.get("type") == "page" and url_part in target.get("url", ""):
+                    self._cdp_get(f"/json/close/{target['id']}")
+                    return True
+            return False
+        except Exception:
+            self._cdp_down_until = time.monotonic() + CDP_RETRY_SECONDS
+            return None
+
+    def _cdp_get(self, path: str) -> bytes:
+        """
+        GET a DevTools endpoint over one reused keep-alive connection. If
+        Chrome dropped the idle connection, reconnect once and retry.
+        """
+        for attempt in range(2):
+            if self._cdp_conn is None:
+                self._cdp_conn = http.client.HTTPConnection(CHROME_DEBUG_HOST, CHROME_DEBUG_PORT, timeout=0.5)
+            try:
+                self._cdp_conn.request("GET", path)
+                resp = self._cdp_conn.getresponse()
+                body = resp.read()
+                if resp.will_close:
+                    self._cdp_conn.close()
+                    self._cdp_conn = None
+                return body
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self._cdp_conn.close()
+                self._cdp_conn = None
+                if attempt:
+                    raise
+            except Exception:
+                self._cdp_conn.close()
+                self._cdp_conn = None
+                raise
+
+    def _osascript(self, script: str, timeout: Optional[int]) -> Tuple[bool, str]:
+        """Run a script, in-process when possible. Returns (succeeded, stripped result)."""
+        if APPLESCRIPT_IN_PROCESS:
+            if timeout is not None:
+                script = f"with timeout of {timeout} seconds\n{script}\nend timeout"
+            result, error = NSAppleScript.alloc().initWithSource_(script).executeAndReturnError_(None)
+            if error is not None:
+                logger.error(f"AppleScript error: {error.get('NSAppleScriptErrorMessage', error)}")
+                return False, ""
+            if result is None:
+                return True, ""
+            text = result.stringValue()
+            if text is None:
+                text = _BOOLEAN_DESCRIPTORS.get(result.descriptorType(), "")
+            return True, text.strip()
+        
+        result = spawn.run(
+            [spawn.OSASCRIPT, '-e', script],
+            capture_output=True,
+            text=True,
+            timeout=timeout
+        )
+        return result.returncode == 0, result.stdout.strip()
+
 if __name__ == "__main__":
     server = MCPServer()
     server.run()
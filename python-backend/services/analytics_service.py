@@ -3,6 +3,7 @@ Analytics Service - SQLite Operations
 All analytics-related database operations go through local SQLite.
 """
 
+import json
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from uuid import UUID
@@ -69,7 +70,6 @@ def create_analytics_event(event_data: AnalyticsEventCreate) -> bool:
         data = event_data.to_dict()
         
         # Convert metadata to JSON string
-        import json
         metadata_json = json.dumps(data.get("metadata", {}))
         
         with get_sqlite_cursor() as cursor:
@@ -99,8 +99,6 @@ def get_analytics_event(event_id: UUID) -> Optional[AnalyticsEvent]:
     Returns None if event not found or on error.
     """
     try:
-        import json
-        
         with get_sqlite_cursor() as cursor:
             cursor.execute("""
                 SELECT * FROM analytics_events WHERE id = ?
@@ -131,8 +129,6 @@ def get_analytics_events_by_user(user_id: UUID, limit: int = 100) -> List[Analyt
     Returns empty list if no events found or on error.
     """
     try:
-        import json
-        
         with get_sqlite_cursor() as cursor:
             cursor.execute("""
                 SELECT * FROM analytics_events 
@@ -163,8 +159,6 @@ def get_analytics_events_by_session(session_id: str, limit: int = 100) -> List[A
     Returns empty list if no events found or on error.
     """
     try:
-        import json
-        
         with get_sqlite_cursor() as cursor:
             cursor.execute("""
                 SELECT * FROM analytics_events 
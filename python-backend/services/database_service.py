@@ -5,9 +5,24 @@ All data stays on user's machine for privacy and performance.
 
 import sqlite3
 import os
+import json
+import math
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import date, datetime
+from utils.logs import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+except ImportError:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
 
 class DatabaseService:
     """
@@ -20,13 +35,30 @@ class DatabaseService:
         app_dir = Path.home() / '.lifecoach'
         app_dir.mkdir(exist_ok=True)
         self.db_path = app_dir / 'user_data.db'
+        # Serializes in-process writers so they queue here instead of
+        # spinning in SQLite's busy handler. Re-entrant because some writers
+        # call others (update_xp -> init_user_stats).
+        self.write_lock = threading.RLock()
         self._init_database()
     
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the per-connection performance pragmas applied."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL; one fsync per checkpoint, not per commit
+        conn.execute("PRAGMA busy_timeout=30000")
+        conn.execute("PRAGMA wal_autocheckpoint=1000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        return conn
+    
     def _init_database(self):
         """Create tables if they don't exist."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
+        # WAL is persistent on the file: batched writers no longer block readers
+        cursor.execute("PRAGMA journal_mode=WAL")
+        
         # Table 1: Users (New in v2)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS users (
@@ -196,6 +228,18 @@ class DatabaseService:
             )
         """)
 
+        # Migrations for events: plain columns for the high-volume activity
+        # events so they are written and read without JSON
+        try:
+            cursor.execute("ALTER TABLE events ADD COLUMN subject TEXT")
+        except sqlite3.OperationalError:
+            pass
+            
+        try:
+            cursor.execute("ALTER TABLE events ADD COLUMN detail TEXT")
+        except sqlite3.OperationalError:
+            pass
+
         # Migrations for user_goals
         try:
             cursor.execute("ALTER TABLE user_goals ADD COLUMN category TEXT")
@@ -218,34 +262,44 @@ class DatabaseService:
             )
         """)
 
+        # Table 11: Roadmap Cache (ResearchAgent responses by normalized goal)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS roadmap_cache (
+                goal_hash TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
         conn.commit()
         conn.close()
-        print(f"✅ Database initialized at {self.db_path}")
+        logger.info("✅ Database initialized at %s", self.db_path)
 
     # ==================== USER OPERATIONS ====================
 
     def create_user(self, user_id: str, email: str = None, name: str = None) -> Dict:
         """Create a new user or return existing."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("""
-                INSERT INTO users (id, email, name)
-                VALUES (?, ?, ?)
-                ON CONFLICT(id) DO UPDATE SET
-                    email = COALESCE(excluded.email, email),
-                    name = COALESCE(excluded.name, name)
-            """, (user_id, email, name))
-            
-            conn.commit()
-            return self.get_user(user_id)
-        finally:
-            conn.close()
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            try:
+                cursor.execute("""
+                    INSERT INTO users (id, email, name)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        email = COALESCE(excluded.email, email),
+                        name = COALESCE(excluded.name, name)
+                """, (user_id, email, name))
+                
+                conn.commit()
+                return self.get_user(user_id)
+            finally:
+                conn.close()
 
     def get_user(self, user_id: str) -> Optional[Dict]:
         """Get user profile."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -261,18 +315,19 @@ class DatabaseService:
         if not consented:
             return # We don't store non-consent? Or maybe we do. For now, only positive consent.
             
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("""
-                UPDATE users 
-                SET privacy_consent_version = ?, privacy_consent_date = CURRENT_TIMESTAMP
-                WHERE id = ?
-            """, (version, user_id))
-            conn.commit()
-        finally:
-            conn.close()
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            try:
+                cursor.execute("""
+                    UPDATE users 
+                    SET privacy_consent_version = ?, privacy_consent_date = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                """, (version, user_id))
+                conn.commit()
+            finally:
+                conn.close()
 
     # ... (existing methods) ...
 
@@ -280,7 +335,7 @@ class DatabaseService:
 
     def get_user_stats(self, user_id: str) -> Dict:
         """Get user's gamification stats (XP, Level)."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -299,103 +354,105 @@ class DatabaseService:
 
     def init_user_stats(self, user_id: str):
         """Initialize stats for a new user."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
-                "INSERT OR IGNORE INTO user_stats (user_id) VALUES (?)",
-                (user_id,)
-            )
-            conn.commit()
-        finally:
-            conn.close()
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    "INSERT OR IGNORE INTO user_stats (user_id) VALUES (?)",
+                    (user_id,)
+                )
+                conn.commit()
+            finally:
+                conn.close()
 
     def update_xp(self, user_id: str, xp_change: int) -> Dict:
         """
         Update user XP and calculate level.
         Returns {new_xp, new_level, leveled_up}.
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            # Get current stats
-            cursor.execute("SELECT xp, level FROM user_stats WHERE user_id = ?", (user_id,))
-            row = cursor.fetchone()
-            
-            if not row:
-                self.init_user_stats(user_id)
-                current_xp, current_level = 0, 1
-            else:
-                current_xp, current_level = row
-            
-            # Calculate new XP (prevent negative)
-            new_xp = max(0, current_xp + xp_change)
-            
-            # Calculate new Level (Simple formula: Level = 1 + sqrt(XP / 100))
-            # Level 1: 0-99 XP
-            # Level 2: 100-399 XP
-            # Level 3: 400-899 XP
-            import math
-            new_level = 1 + int(math.sqrt(new_xp / 100))
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
             
-            leveled_up = new_level > current_level
-            
-            cursor.execute(
-                "UPDATE user_stats SET xp = ?, level = ?, updated_at = CURRENT_TIMESTAMP WHERE user_id = ?",
-                (new_xp, new_level, user_id)
-            )
-            conn.commit()
-            
-            return {
-                "xp": new_xp,
-                "level": new_level,
-                "leveled_up": leveled_up,
-                "xp_change": xp_change
-            }
-        finally:
-            conn.close()
+            try:
+                # Get current stats
+                cursor.execute("SELECT xp, level FROM user_stats WHERE user_id = ?", (user_id,))
+                row = cursor.fetchone()
+                
+                if not row:
+                    self.init_user_stats(user_id)
+                    current_xp, current_level = 0, 1
+                else:
+                    current_xp, current_level = row
+                
+                # Calculate new XP (prevent negative)
+                new_xp = max(0, current_xp + xp_change)
+                
+                # Calculate new Level (Simple formula: Level = 1 + sqrt(XP / 100))
+                # Level 1: 0-99 XP
+                # Level 2: 100-399 XP
+                # Level 3: 400-899 XP
+                new_level = 1 + int(math.sqrt(new_xp / 100))
+                
+                leveled_up = new_level > current_level
+                
+                cursor.execute(
+                    "UPDATE user_stats SET xp = ?, level = ?, updated_at = CURRENT_TIMESTAMP WHERE user_id = ?",
+                    (new_xp, new_level, user_id)
+                )
+                conn.commit()
+                
+                return {
+                    "xp": new_xp,
+                    "level": new_level,
+                    "leveled_up": leveled_up,
+                    "xp_change": xp_change
+                }
+            finally:
+                conn.close()
     
     # ==================== GOAL OPERATIONS ====================
     
     def save_goal(self, user_id: str, goal_text: str, timeframe: str, strategy: str = None, category: str = None, target_minutes: int = None) -> Dict:
         """Save new goal and deactivate previous ones."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            # Deactivate previous goals
-            cursor.execute(
-                "UPDATE user_goals SET is_active = 0 WHERE user_id = ?",
-                (user_id,)
-            )
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
             
-            # Insert new goal
-            cursor.execute(
-                """INSERT INTO user_goals 
-                   (user_id, goal_text, timeframe, strategy, category, target_minutes_per_day) 
-                   VALUES (?, ?, ?, ?, ?, ?)""",
-                (user_id, goal_text, timeframe, strategy, category, target_minutes)
-            )
-            
-            goal_id = cursor.lastrowid
-            conn.commit()
-            
-            return {
-                "id": goal_id,
-                "user_id": user_id,
-                "goal_text": goal_text,
-                "timeframe": timeframe,
-                "strategy": strategy,
-                "category": category,
-                "target_minutes_per_day": target_minutes
-            }
-        finally:
-            conn.close()
+            try:
+                # Deactivate previous goals
+                cursor.execute(
+                    "UPDATE user_goals SET is_active = 0 WHERE user_id = ?",
+                    (user_id,)
+                )
+                
+                # Insert new goal
+                cursor.execute(
+                    """INSERT INTO user_goals 
+                       (user_id, goal_text, timeframe, strategy, category, target_minutes_per_day) 
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    (user_id, goal_text, timeframe, strategy, category, target_minutes)
+                )
+                
+                goal_id = cursor.lastrowid
+                conn.commit()
+                
+                return {
+                    "id": goal_id,
+                    "user_id": user_id,
+                    "goal_text": goal_text,
+                    "timeframe": timeframe,
+                    "strategy": strategy,
+                    "category": category,
+                    "target_minutes_per_day": target_minutes
+                }
+            finally:
+                conn.close()
     
     def get_current_goal(self, user_id: str) -> Optional[Dict]:
         """Get user's current active goal."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -412,7 +469,7 @@ class DatabaseService:
 
     def get_user_goals(self, user_id: str) -> List[Dict]:
         """Get all goals for a user, ordered by date."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -429,52 +486,54 @@ class DatabaseService:
 
     def set_active_goal(self, user_id: str, goal_id: int) -> bool:
         """Set a specific goal as active and deactivate others."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            # Verify goal belongs to user
-            cursor.execute("SELECT id FROM user_goals WHERE id = ? AND user_id = ?", (goal_id, user_id))
-            if not cursor.fetchone():
-                return False
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
             
-            # Deactivate all
-            cursor.execute("UPDATE user_goals SET is_active = 0 WHERE user_id = ?", (user_id,))
-            
-            # Activate target
-            cursor.execute("UPDATE user_goals SET is_active = 1 WHERE id = ?", (goal_id,))
-            
-            conn.commit()
-            return True
-        finally:
-            conn.close()
+            try:
+                # Verify goal belongs to user
+                cursor.execute("SELECT id FROM user_goals WHERE id = ? AND user_id = ?", (goal_id, user_id))
+                if not cursor.fetchone():
+                    return False
+                
+                # Deactivate all
+                cursor.execute("UPDATE user_goals SET is_active = 0 WHERE user_id = ?", (user_id,))
+                
+                # Activate target
+                cursor.execute("UPDATE user_goals SET is_active = 1 WHERE id = ?", (goal_id,))
+                
+                conn.commit()
+                return True
+            finally:
+                conn.close()
     
     # ==================== APP USAGE OPERATIONS ====================
     
     def upsert_app_usage(self, user_id: str, app_name: str, seconds: int, visits: int):
         """Update or insert app usage for today."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            today = date.today().isoformat()
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
             
-            cursor.execute("""
-                INSERT INTO application_usage (user_id, app_name, total_seconds, visits, date)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(user_id, app_name, date) DO UPDATE SET
-                    total_seconds = total_seconds + excluded.total_seconds,
-                    visits = visits + excluded.visits,
-                    last_active = CURRENT_TIMESTAMP
-            """, (user_id, app_name, seconds, visits, today))
-            
-            conn.commit()
-        finally:
-            conn.close()
+            try:
+                today = date.today().isoformat()
+                
+                cursor.execute("""
+                    INSERT INTO application_usage (user_id, app_name, total_seconds, visits, date)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(user_id, app_name, date) DO UPDATE SET
+                        total_seconds = total_seconds + excluded.total_seconds,
+                        visits = visits + excluded.visits,
+                        last_active = CURRENT_TIMESTAMP
+                """, (user_id, app_name, seconds, visits, today))
+                
+                conn.commit()
+            finally:
+                conn.close()
     
     def get_app_usage(self, user_id: str, days: int = 7) -> Dict:
         """Get app usage for last N days."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -502,28 +561,77 @@ class DatabaseService:
     
     def upsert_chrome_tab(self, user_id: str, url: str, title: str, time_seconds: int):
         """Update or insert Chrome tab data for today."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            try:
+                today = date.today().isoformat()
+                
+                cursor.execute("""
+                    INSERT INTO chrome_tabs (user_id, url, title, total_time, date)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(user_id, url, date) DO UPDATE SET
+                        total_time = total_time + excluded.total_time,
+                        title = excluded.title,
+                        last_active = CURRENT_TIMESTAMP
+                """, (user_id, url, title, time_seconds, today))
+                
+                conn.commit()
+            finally:
+                conn.close()
+    
+    def upsert_usage_deltas(self, user_id: str, app_rows: List[Tuple[str, int, int]], tab_rows: List[Tuple[str, str, int]],
+                            daily_stats: Optional[Dict] = None):
+        """
+        Add app usage and Chrome tab deltas for today in a single transaction
+        (one commit, one fsync for the whole sync).
         
-        try:
-            today = date.today().isoformat()
+        Args:
+            app_rows: List of (app_name, seconds, visits) tuples
+            tab_rows: List of (url, title, time_seconds) tuples
+            daily_stats: Optional stats for today, written as by save_daily_stats
+        """
+        if not app_rows and not tab_rows and not daily_stats:
+            return
+        
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
             
-            cursor.execute("""
-                INSERT INTO chrome_tabs (user_id, url, title, total_time, date)
-                VALUES (?, ?, ?, ?, ?)
-                ON CONFLICT(user_id, url, date) DO UPDATE SET
-                    total_time = total_time + excluded.total_time,
-                    title = excluded.title,
-                    last_active = CURRENT_TIMESTAMP
-            """, (user_id, url, title, time_seconds, today))
-            
-            conn.commit()
-        finally:
-            conn.close()
+            try:
+                today = date.today().isoformat()
+            
+                if app_rows:
+                    cursor.executemany("""
+                        INSERT INTO application_usage (user_id, app_name, total_seconds, visits, date)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(user_id, app_name, date) DO UPDATE SET
+                            total_seconds = total_seconds + excluded.total_seconds,
+                            visits = visits + excluded.visits,
+                            last_active = CURRENT_TIMESTAMP
+                    """, [(user_id, app_name, seconds, visits, today) for app_name, seconds, visits in app_rows])
+            
+                if tab_rows:
+                    cursor.executemany("""
+                        INSERT INTO chrome_tabs (user_id, url, title, total_time, date)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT(user_id, url, date) DO UPDATE SET
+                            total_time = total_time + excluded.total_time,
+                            title = excluded.title,
+                            last_active = CURRENT_TIMESTAMP
+                    """, [(user_id, url, title, time_seconds, today) for url, title, time_seconds in tab_rows])
+            
+                if daily_stats:
+                    self._upsert_daily_stats(cursor, user_id, daily_stats, today)
+            
+                conn.commit()
+            finally:
+                conn.close()
     
     def get_chrome_tabs(self, user_id: str, days: int = 7) -> List[Dict]:
         """Get Chrome tabs for last N days."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -544,27 +652,28 @@ class DatabaseService:
     
     def upsert_context_switches(self, user_id: str, count: int):
         """Update or insert context switches for today."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            today = date.today().isoformat()
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
             
-            cursor.execute("""
-                INSERT INTO context_switches (user_id, count, date)
-                VALUES (?, ?, ?)
-                ON CONFLICT(user_id, date) DO UPDATE SET
-                    count = excluded.count,
-                    updated_at = CURRENT_TIMESTAMP
-            """, (user_id, count, today))
-            
-            conn.commit()
-        finally:
-            conn.close()
+            try:
+                today = date.today().isoformat()
+                
+                cursor.execute("""
+                    INSERT INTO context_switches (user_id, count, date)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT(user_id, date) DO UPDATE SET
+                        count = excluded.count,
+                        updated_at = CURRENT_TIMESTAMP
+                """, (user_id, count, today))
+                
+                conn.commit()
+            finally:
+                conn.close()
     
     def get_context_switches(self, user_id: str, days: int = 7) -> int:
         """Get total context switches for last N days."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         try:
@@ -583,7 +692,7 @@ class DatabaseService:
     
     def get_nudge_settings(self, user_id: str) -> bool:
         """Get user's Smart Nudge enabled status."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         try:
@@ -599,43 +708,64 @@ class DatabaseService:
     
     def set_nudge_settings(self, user_id: str, enabled: bool):
         """Update user's Smart Nudge enabled status."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("""
-                INSERT INTO smart_nudge_settings (user_id, enabled)
-                VALUES (?, ?)
-                ON CONFLICT(user_id) DO UPDATE SET
-                    enabled = excluded.enabled,
-                    updated_at = CURRENT_TIMESTAMP
-            """, (user_id, 1 if enabled else 0))
-            
-            conn.commit()
-        finally:
-            conn.close()
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            try:
+                cursor.execute("""
+                    INSERT INTO smart_nudge_settings (user_id, enabled)
+                    VALUES (?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET
+                        enabled = excluded.enabled,
+                        updated_at = CURRENT_TIMESTAMP
+                """, (user_id, 1 if enabled else 0))
+                
+                conn.commit()
+            finally:
+                conn.close()
     
     def save_nudge_event(self, user_id: str, goal_id: Optional[int], level: int, distractor: str):
         """Save a nudge event to history."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        self.save_nudge_events_bulk([(user_id, goal_id, level, distractor, None)])
+    
+    def save_nudge_events_bulk(self, rows: List[Tuple[str, Optional[int], int, str, Optional[str]]]):
+        """
+        Save many nudge events (and their NUDGE_SENT log events) in one transaction.
         
-        try:
-            cursor.execute("""
-                INSERT INTO nudge_history (user_id, goal_id, nudge_level, distractor_url)
-                VALUES (?, ?, ?, ?)
-            """, (user_id, goal_id, level, distractor))
-            
-            # Also log as a generic event
-            self.log_event(user_id, goal_id, "NUDGE_SENT", f"Level {level} - {distractor}")
+        Args:
+            rows: List of (user_id, goal_id, level, distractor, timestamp) tuples;
+                  timestamp is UTC 'YYYY-MM-DD HH:MM:SS', or None for now
+        """
+        if not rows:
+            return
+        
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
             
-            conn.commit()
-        finally:
-            conn.close()
+            try:
+                cursor.executemany("""
+                    INSERT INTO nudge_history (user_id, goal_id, nudge_level, distractor_url, timestamp)
+                    VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                """, rows)
+                
+                # Also log as generic events
+                cursor.executemany("""
+                    INSERT INTO events (user_id, goal_id, type, metadata, timestamp)
+                    VALUES (?, ?, 'NUDGE_SENT', ?, COALESCE(?, CURRENT_TIMESTAMP))
+                """, [
+                    (user_id, goal_id, f"Level {level} - {distractor}", timestamp)
+                    for user_id, goal_id, level, distractor, timestamp in rows
+                ])
+                
+                conn.commit()
+            finally:
+                conn.close()
     
     def get_last_nudge_time(self, user_id: str) -> Optional[datetime]:
         """Get timestamp of last nudge for user."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         try:
@@ -653,40 +783,57 @@ class DatabaseService:
         finally:
             conn.close()
 
-    # ==================== V2 OPERATIONS (STATS & EVENTS) ====================
-
-    def save_daily_stats(self, user_id: str, stats: Dict):
-        """Save or update daily stats."""
-        conn = sqlite3.connect(self.db_path)
+    def get_last_nudge_times(self) -> Dict[str, datetime]:
+        """Get the timestamp of the last nudge for every user, in one query."""
+        conn = self._connect()
         cursor = conn.cursor()
         
         try:
-            today = date.today().isoformat()
-            
             cursor.execute("""
-                INSERT INTO daily_stats (
-                    date, user_id, goal_id, success_probability, 
-                    focus_minutes, distraction_minutes, deep_work_blocks
-                ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(date, user_id) DO UPDATE SET
-                    success_probability = COALESCE(excluded.success_probability, daily_stats.success_probability),
-                    goal_id = COALESCE(excluded.goal_id, daily_stats.goal_id),
-                    focus_minutes = excluded.focus_minutes,
-                    distraction_minutes = excluded.distraction_minutes,
-                    deep_work_blocks = excluded.deep_work_blocks
-            """, (
-                today, user_id, stats.get('goal_id'), stats.get('success_probability'),
-                stats.get('focus_minutes', 0), stats.get('distraction_minutes', 0),
-                stats.get('deep_work_blocks', 0)
-            ))
-            
-            conn.commit()
+                SELECT user_id, MAX(timestamp) FROM nudge_history
+                GROUP BY user_id
+            """)
+            
+            return {user_id: datetime.fromisoformat(ts) for user_id, ts in cursor.fetchall() if ts}
         finally:
             conn.close()
+
+    # ==================== V2 OPERATIONS (STATS & EVENTS) ====================
+
+    def save_daily_stats(self, user_id: str, stats: Dict):
+        """Save or update daily stats."""
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            try:
+                self._upsert_daily_stats(cursor, user_id, stats, date.today().isoformat())
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _upsert_daily_stats(self, cursor, user_id: str, stats: Dict, today: str):
+        """Insert or update today's daily_stats row on an open cursor (caller commits)."""
+        cursor.execute("""
+            INSERT INTO daily_stats (
+                date, user_id, goal_id, success_probability, 
+                focus_minutes, distraction_minutes, deep_work_blocks
+            ) VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(date, user_id) DO UPDATE SET
+                success_probability = COALESCE(excluded.success_probability, daily_stats.success_probability),
+                goal_id = COALESCE(excluded.goal_id, daily_stats.goal_id),
+                focus_minutes = excluded.focus_minutes,
+                distraction_minutes = excluded.distraction_minutes,
+                deep_work_blocks = excluded.deep_work_blocks
+        """, (
+            today, user_id, stats.get('goal_id'), stats.get('success_probability'),
+            stats.get('focus_minutes', 0), stats.get('distraction_minutes', 0),
+            stats.get('deep_work_blocks', 0)
+        ))
             
     def get_daily_stats(self, user_id: str, days: int = 7) -> List[Dict]:
         """Get daily stats for charting."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -701,24 +848,67 @@ class DatabaseService:
             return [dict(row) for row in rows]
         finally:
             conn.close()
-            
-    def log_event(self, user_id: str, goal_id: Optional[int], event_type: str, metadata: str = None):
-        """Log a granular event."""
-        conn = sqlite3.connect(self.db_path)
+
+    def get_stats_for_date(self, user_id: str, date_str: str) -> Optional[Dict]:
+        """Get daily stats for a single day (YYYY-MM-DD), or None if there is no row."""
+        conn = self._connect()
+        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
         try:
+            # Point lookup on the (date, user_id) primary key
             cursor.execute("""
-                INSERT INTO events (user_id, goal_id, type, metadata)
-                VALUES (?, ?, ?, ?)
-            """, (user_id, goal_id, event_type, metadata))
-            conn.commit()
+                SELECT * FROM daily_stats
+                WHERE date = ? AND user_id = ?
+                LIMIT 1
+            """, (date_str, user_id))
+            
+            row = cursor.fetchone()
+            return dict(row) if row else None
         finally:
             conn.close()
+            
+    def log_event(self, user_id: str, goal_id: Optional[int], event_type: str, metadata: str = None):
+        """Log a granular event."""
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            try:
+                cursor.execute("""
+                    INSERT INTO events (user_id, goal_id, type, metadata)
+                    VALUES (?, ?, ?, ?)
+                """, (user_id, goal_id, event_type, metadata))
+                conn.commit()
+            finally:
+                conn.close()
+
+    def log_events_batch(self, rows: List[Tuple[str, Optional[int], str, Optional[str], Optional[str], Optional[str]]]):
+        """
+        Log many events in one transaction.
+        
+        Args:
+            rows: List of (user_id, goal_id, event_type, metadata, subject, detail) tuples
+        """
+        if not rows:
+            return
+        
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            try:
+                cursor.executemany("""
+                    INSERT INTO events (user_id, goal_id, type, metadata, subject, detail)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, rows)
+                conn.commit()
+            finally:
+                conn.close()
 
     def get_recent_logs(self, user_id: str = None, limit: int = 50) -> List[Dict]:
         """Get recent activity logs."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -750,16 +940,18 @@ class DatabaseService:
                 
                 if row["type"] == "URL_VISIT":
                     log_type = "app"
-                    # Parse metadata json if possible
-                    try:
-                        import json
-                        meta = json.loads(row["metadata"])
-                        message = f"Visited {meta.get('url')}"
-                    except:
-                        pass
+                    if row["subject"] is not None:
+                        message = f"Visited {row['subject']}"
+                    else:
+                        # Older rows keep the payload as metadata json
+                        try:
+                            meta = _json_loads(row["metadata"])
+                            message = f"Visited {meta.get('url')}"
+                        except:
+                            pass
                 elif row["type"] == "CONTEXT_SWITCH":
                     log_type = "app"
-                    message = f"Switched to {row['metadata']}"
+                    message = f"Switched to {row['subject'] if row['subject'] is not None else row['metadata']}"
                 elif row["type"] == "NUDGE_SHOWN":
                     log_type = "nudge"
                     message = "Smart Nudge Triggered"
@@ -780,28 +972,29 @@ class DatabaseService:
                 
             return logs
         except Exception as e:
-            print(f"Error fetching logs: {e}")
+            logger.error("Error fetching logs: %s", e)
             return []
         finally:
             conn.close()
             
     def save_ai_report(self, user_id: str, report_type: str, content: str):
         """Save an AI generated report."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        try:
-            cursor.execute("""
-                INSERT INTO ai_reports (user_id, type, content)
-                VALUES (?, ?, ?)
-            """, (user_id, report_type, content))
-            conn.commit()
-        finally:
-            conn.close()
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            try:
+                cursor.execute("""
+                    INSERT INTO ai_reports (user_id, type, content)
+                    VALUES (?, ?, ?)
+                """, (user_id, report_type, content))
+                conn.commit()
+            finally:
+                conn.close()
             
     def get_latest_report(self, user_id: str, report_type: str) -> Optional[Dict]:
         """Get the most recent report of a specific type."""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
@@ -818,6 +1011,40 @@ class DatabaseService:
         finally:
             conn.close()
 
+    def get_cached_roadmap(self, goal_hash: str, max_age_days: int = 30) -> Optional[Dict]:
+        """Get a cached goal roadmap, or None if missing or older than max_age_days."""
+        conn = self._connect()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("""
+                SELECT response FROM roadmap_cache
+                WHERE goal_hash = ? AND created_at >= datetime('now', '-' || ? || ' days')
+            """, (goal_hash, max_age_days))
+            
+            row = cursor.fetchone()
+            return _json_loads(row[0]) if row else None
+        finally:
+            conn.close()
+
+    def save_cached_roadmap(self, goal_hash: str, response: Dict):
+        """Save (or refresh) a goal roadmap in the cache."""
+        with self.write_lock:
+            conn = self._connect()
+            cursor = conn.cursor()
+            
+            try:
+                cursor.execute("""
+                    INSERT INTO roadmap_cache (goal_hash, response, created_at)
+                    VALUES (?, ?, CURRENT_TIMESTAMP)
+                    ON CONFLICT(goal_hash) DO UPDATE SET
+                        response = excluded.response,
+                        created_at = excluded.created_at
+                """, (goal_hash, _json_dumps(response)))
+                conn.commit()
+            finally:
+                conn.close()
+
 # Singleton instance
 _db_service: Optional[DatabaseService] = None
 
@@ -92,6 +92,9 @@ class MCPService:
     def close_chrome_tab(self, url_part: str) -> bool:
         return self._send_request("close_chrome_tab", {"url_part": url_part})
 
+    def notify_and_close_chrome_tab(self, title: str, message: str, url_part: str) -> bool:
+        return self._send_request("notify_and_close_chrome_tab", {"title": title, "message": message, "url_part": url_part})
+
     def open_url(self, url: str) -> bool:
         return self._send_request("open_url", {"url": url})
 
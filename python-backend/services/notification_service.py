@@ -1,9 +1,17 @@
 import platform
-import subprocess
 import logging
 
+from utils import spawn
+
 logger = logging.getLogger(__name__)
 
+# In-process delivery through Foundation when pyobjc is available
+try:
+    from Foundation import NSUserNotification, NSUserNotificationCenter, NSUserNotificationDefaultSoundName
+    NS_NOTIFICATIONS_AVAILABLE = True
+except ImportError:
+    NS_NOTIFICATIONS_AVAILABLE = False
+
 class NotificationService:
     """
     Service for sending native system notifications.
@@ -12,6 +20,15 @@ class NotificationService:
     
     def __init__(self):
         self.platform = platform.system()
+        
+        # None when running from an interpreter without an app bundle, where
+        # macOS hands out no notification center; osascript is used then
+        self._center = None
+        if self.platform == "Darwin" and NS_NOTIFICATIONS_AVAILABLE:
+            try:
+                self._center = NSUserNotificationCenter.defaultUserNotificationCenter()
+            except Exception as e:
+                logger.warning(f"Notification center unavailable: {e}")
 
     def send_notification(self, title: str, message: str, sound: str = "default"):
         """
@@ -28,7 +45,18 @@ class NotificationService:
             logger.warning(f"Notifications not supported on {self.platform}")
 
     def _send_macos_notification(self, title: str, message: str, sound: str):
-        """Send macOS notification using osascript."""
+        """Send macOS notification in-process, or using osascript as a fallback."""
+        if self._center is not None:
+            try:
+                notification = NSUserNotification.alloc().init()
+                notification.setTitle_(title)
+                notification.setInformativeText_(message)
+                notification.setSoundName_(NSUserNotificationDefaultSoundName if sound == "default" else sound)
+                self._center.deliverNotification_(notification)
+                return
+            except Exception as e:
+                logger.warning(f"In-process notification failed, using osascript: {e}")
+        
         try:
             # Escape quotes to prevent script errors
             safe_title = title.replace('"', '\\"')
@@ -36,8 +64,8 @@ class NotificationService:
             
             script = f'display notification "{safe_message}" with title "{safe_title}" sound name "{sound}"'
             
-            subprocess.run(
-                ['osascript', '-e', script],
+            spawn.run(
+                [spawn.OSASCRIPT, '-e', script],
                 capture_output=True,
                 text=True,
                 timeout=5
@@ -6,9 +6,21 @@ Used for advanced context analysis for Smart Nudge.
 
 import os
 import json
-from typing import Optional, Dict, Any, List
+import time
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, AsyncIterator
+import httpx
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, APIConnectionError
+from utils.logs import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    import orjson
+    _json_loads = orjson.loads  # Its decode errors subclass json.JSONDecodeError
+except ImportError:
+    _json_loads = json.loads
 
 # Load environment variables
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -18,6 +30,91 @@ env_path = os.path.join(project_root, '.env')
 
 load_dotenv(env_path)
 
+_DEFAULT_JSON_SYSTEM_PROMPT = "You are a helpful assistant that outputs JSON."
+
+# Transient failures (429, 5xx, timeouts, dropped connections) are retried by
+# the client with exponential backoff and jitter, so agents only see hard errors
+MAX_RETRIES = 4
+REQUEST_TIMEOUT_SECONDS = 60.0
+
+# Once a call fails to connect even after those retries, further calls fail
+# fast for a back-off window that doubles on every failure until one succeeds
+OFFLINE_BACKOFF_SECONDS = 5.0
+MAX_OFFLINE_BACKOFF_SECONDS = 300.0
+
+# Static Smart Nudge analysis prompt; only the activity fields are filled in per call
+_NUDGE_ANALYSIS_TEMPLATE = """
+        You are an intelligent focus assistant.
+        The user's current goal is: "{goal_text}".
+        
+        CURRENT ACTIVITY:
+        - Active App: {active_app}
+        - Current URL: {current_url}
+        - Open Tabs: {tab_titles} (showing top 5)
+        
+        Analyze if the user is distracted or on track.
+        - Differentiate between "productive" learning (e.g. YouTube tutorial for coding) vs "distraction" (e.g. funny cat videos).
+        - If the URL contains "youtube.com", check the title for relevance to "{goal_text}".
+        - If the user is on a known distractor (social media, entertainment) and it's NOT relevant to the goal, flag it.
+        
+        Determine the appropriate intervention level (0-3):
+        0: On track or neutral.
+        1: Mild distraction (gentle nudge).
+        2: Clear distraction (firm warning).
+        3: Severe/Chronic distraction (intervention needed).
+        
+        Return JSON ONLY:
+        {{
+            "nudge_needed": boolean,
+            "level": int,
+            "reason": "short explanation",
+            "suggested_action": "notify" | "close_tab" | "none"
+        }}
+        """
+
+@lru_cache(maxsize=32)
+def _nudge_prompt_for_goal(goal_text: str) -> str:
+    """
+    The analysis template with the goal already substituted; only the
+    activity fields are left for format(). The goal rarely changes between
+    checks, so this is built once per goal.
+    """
+    escaped = goal_text.replace("{", "{{").replace("}", "}}")
+    return _NUDGE_ANALYSIS_TEMPLATE.replace("{goal_text}", escaped)
+
+class _FieldBoundaryScanner:
+    """
+    Incremental scanner over streamed JSON text. Carries nesting depth and
+    string/escape state across chunks, so each character is looked at once.
+    """
+    __slots__ = ("depth", "in_string", "escaped")
+    
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+    
+    def feed(self, chunk: str) -> int:
+        """Scan chunk; return the index of its last top-level comma, or -1."""
+        last = -1
+        for i, ch in enumerate(chunk):
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif ch == "\\":
+                    self.escaped = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == "{" or ch == "[":
+                self.depth += 1
+            elif ch == "}" or ch == "]":
+                self.depth -= 1
+            elif ch == "," and self.depth == 1:
+                last = i
+        return last
+
 class OpenAIService:
     """
     Centralized service for OpenAI API interactions.
@@ -33,10 +130,38 @@ class OpenAIService:
         """
         self.api_key = os.getenv("OPENAI_API_KEY")
         if not self.api_key:
-            print("⚠️ OPENAI_API_KEY not found in environment variables")
+            logger.warning("⚠️ OPENAI_API_KEY not found in environment variables")
         
-        self.client = AsyncOpenAI(api_key=self.api_key)
+        # One pooled client for every agent (see get_openai_service): keep-alive
+        # connections are reused across calls instead of a TLS handshake each
+        self.client = AsyncOpenAI(
+            api_key=self.api_key,
+            max_retries=MAX_RETRIES,
+            timeout=REQUEST_TIMEOUT_SECONDS,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=50, max_keepalive_connections=20)
+            )
+        )
         self.model_name = model_name
+        
+        self._offline_until = 0.0  # time.monotonic() before which calls fail fast
+        self._offline_backoff = OFFLINE_BACKOFF_SECONDS
+    
+    def _ensure_reachable(self):
+        """Raise ConnectionError while the back-off from a connection failure lasts."""
+        remaining = self._offline_until - time.monotonic()
+        if remaining > 0:
+            raise ConnectionError(f"OpenAI unreachable, next attempt in {remaining:.0f}s")
+    
+    def _record_success(self):
+        """A call got through: the next failure starts from the shortest back-off."""
+        self._offline_backoff = OFFLINE_BACKOFF_SECONDS
+    
+    def _record_failure(self, error: Exception):
+        """Start (or lengthen) the back-off if error was a connection failure."""
+        if isinstance(error, APIConnectionError):
+            self._offline_until = time.monotonic() + self._offline_backoff
+            self._offline_backoff = min(self._offline_backoff * 2, MAX_OFFLINE_BACKOFF_SECONDS)
     
     async def generate_content(
         self, 
@@ -55,6 +180,7 @@ class OpenAIService:
         Returns:
             Generated text response
         """
+        self._ensure_reachable()
         try:
             response = await self.client.chat.completions.create(
                 model=self.model_name,
@@ -62,16 +188,19 @@ class OpenAIService:
                 temperature=temperature,
                 max_tokens=max_output_tokens
             )
+            self._record_success()
             
             return response.choices[0].message.content
         except Exception as e:
-            print(f"Error generating content with OpenAI: {e}")
+            self._record_failure(e)
+            logger.error("Error generating content with OpenAI: %s", e)
             raise
     
     async def generate_structured_content(
         self,
         prompt: str,
-        temperature: float = 0.7
+        temperature: float = 0.7,
+        system_prompt: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Generate structured JSON content using OpenAI.
@@ -80,25 +209,95 @@ class OpenAIService:
         Args:
             prompt: The prompt to send to OpenAI
             temperature: Controls randomness (0.0 - 1.0)
+            system_prompt: Static instructions for the system message (must mention JSON);
+                keeping them out of prompt gives repeated calls a shared prefix
         
         Returns:
             Parsed JSON response as dictionary
         """
+        self._ensure_reachable()
         try:
             response = await self.client.chat.completions.create(
                 model=self.model_name,
                 messages=[
-                    {"role": "system", "content": "You are a helpful assistant that outputs JSON."},
+                    {"role": "system", "content": system_prompt or _DEFAULT_JSON_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=temperature,
                 response_format={"type": "json_object"}
             )
+            self._record_success()
             
             content = response.choices[0].message.content
-            return json.loads(content)
+            return _json_loads(content)
         except Exception as e:
-            print(f"Error generating structured content with OpenAI: {e}")
+            self._record_failure(e)
+            logger.error("Error generating structured content with OpenAI: %s", e)
+            raise
+
+    async def generate_structured_content_stream(
+        self,
+        prompt: str,
+        temperature: float = 0.7,
+        system_prompt: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream structured JSON content using OpenAI.
+        Yields the object parsed so far each time another top-level field
+        completes, then the full object last.
+        
+        Args:
+            prompt: The prompt to send to OpenAI
+            temperature: Controls randomness (0.0 - 1.0)
+            system_prompt: As for generate_structured_content
+        
+        Yields:
+            Partial (then complete) parsed JSON response as dictionary
+        """
+        self._ensure_reachable()
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[
+                    {"role": "system", "content": system_prompt or _DEFAULT_JSON_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=temperature,
+                response_format={"type": "json_object"},
+                stream=True
+            )
+            self._record_success()
+            
+            parts: List[str] = []
+            scanner = _FieldBoundaryScanner()
+            scanned = 0  # Characters received before the current delta
+            fields_seen = 0
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                parts.append(delta)
+                
+                # A comma outside strings at the object's top level ends a
+                # field: everything before it, closed, is a valid object
+                comma = scanner.feed(delta)
+                if comma >= 0:
+                    head = "".join(parts)[:scanned + comma]
+                    try:
+                        partial = _json_loads(head + "}")
+                    except json.JSONDecodeError:
+                        partial = None
+                    if isinstance(partial, dict) and len(partial) > fields_seen:
+                        fields_seen = len(partial)
+                        yield partial
+                scanned += len(delta)
+            
+            yield _json_loads("".join(parts))
+        except Exception as e:
+            self._record_failure(e)
+            logger.error("Error streaming structured content with OpenAI: %s", e)
             raise
 
     async def analyze_context(self, goal: Dict[str, Any], activity_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -116,36 +315,14 @@ class OpenAIService:
         active_app = activity_data.get("active_app", "Unknown")
         current_url = activity_data.get("current_url", "")
         
-        prompt = f"""
-        You are an intelligent focus assistant.
-        The user's current goal is: "{goal_text}".
-        
-        CURRENT ACTIVITY:
-        - Active App: {active_app}
-        - Current URL: {current_url}
-        - Open Tabs: {[t.get('title', '') for t in tabs[:5]]} (showing top 5)
-        
-        Analyze if the user is distracted or on track.
-        - Differentiate between "productive" learning (e.g. YouTube tutorial for coding) vs "distraction" (e.g. funny cat videos).
-        - If the URL contains "youtube.com", check the title for relevance to "{goal_text}".
-        - If the user is on a known distractor (social media, entertainment) and it's NOT relevant to the goal, flag it.
-        
-        Determine the appropriate intervention level (0-3):
-        0: On track or neutral.
-        1: Mild distraction (gentle nudge).
-        2: Clear distraction (firm warning).
-        3: Severe/Chronic distraction (intervention needed).
-        
-        Return JSON ONLY:
-        {{
-            "nudge_needed": boolean,
-            "level": int,
-            "reason": "short explanation",
-            "suggested_action": "notify" | "close_tab" | "none"
-        }}
-        """
+        prompt = _nudge_prompt_for_goal(goal_text).format(
+            active_app=active_app,
+            current_url=current_url,
+            tab_titles=[t.get('title', '') for t in tabs[:5]]
+        )
         
         try:
+            self._ensure_reachable()
             # Reusing generate_structured_content would be cleaner, but keeping specific prompt config for now
             response = await self.client.chat.completions.create(
                 model=self.model_name,
@@ -156,12 +333,14 @@ class OpenAIService:
                 response_format={"type": "json_object"},
                 temperature=0.3
             )
+            self._record_success()
             
             content = response.choices[0].message.content
-            return json.loads(content)
+            return _json_loads(content)
             
         except Exception as e:
-            print(f"❌ OpenAI Analysis Error: {e}")
+            self._record_failure(e)
+            logger.error("❌ OpenAI Analysis Error: %s", e)
             return {"nudge_needed": False, "reason": f"Analysis failed: {str(e)}"}
 
 # Global instance (singleton pattern)
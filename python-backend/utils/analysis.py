@@ -3,6 +3,10 @@ Analysis Utility Module
 Provides shared logic for categorizing websites and apps into productivity buckets.
 """
 
+import heapq
+from functools import lru_cache
+from operator import itemgetter
+from urllib.parse import urlsplit
 from typing import Dict, List, Any
 
 # Site Categories
@@ -19,22 +23,49 @@ DISTRACTOR_SITES = [
     "facebook.com", "tiktok.com", "twitch.tv", "hulu.com", "disneyplus.com"
 ]
 
+# Sites indexed by domain; a URL matches a site if its host is that domain or
+# a subdomain of it. Entries with a path ("google.com/docs") also need that prefix.
+def _index_sites(sites) -> Dict[str, List[str]]:
+    index: Dict[str, List[str]] = {}
+    for site in sites:
+        domain, _, path = site.partition("/")
+        index.setdefault(domain, []).append("/" + path if path else "")
+    return index
+
+_DISTRACTOR_DOMAINS = _index_sites(DISTRACTOR_SITES)
+_PRODUCTIVE_DOMAINS = _index_sites(site for sites in PRODUCTIVE_SITES.values() for site in sites)
+
+def _matches_site(host: str, path: str, index: Dict[str, List[str]]) -> bool:
+    """Whether host (or a parent domain of it) plus path matches an indexed site."""
+    labels = host.split(".")
+    for i in range(len(labels) - 1):
+        prefixes = index.get(".".join(labels[i:]))
+        if prefixes is not None and any(path.startswith(prefix) for prefix in prefixes):
+            return True
+    return False
+
+@lru_cache(maxsize=4096)
 def categorize_url(url: str) -> str:
     """
     Categorize a URL into 'productive', 'distracting', or 'neutral'.
+    Matches on the URL's host, so "x.com" doesn't catch "dropbox.com" and a
+    site named in another page's path or query doesn't count.
+    Memoized: the same tab URLs are categorized on every analysis pass.
     """
-    url_lower = url.lower()
+    try:
+        parts = urlsplit(url if "//" in url else "//" + url)
+        host = parts.hostname or ""
+    except ValueError:
+        return "neutral"
+    path = parts.path.lower()
     
     # Check distractors first
-    for site in DISTRACTOR_SITES:
-        if site in url_lower:
-            return "distracting"
+    if _matches_site(host, path, _DISTRACTOR_DOMAINS):
+        return "distracting"
             
     # Check productive
-    for category, sites in PRODUCTIVE_SITES.items():
-        for site in sites:
-            if site in url_lower:
-                return "productive"
+    if _matches_site(host, path, _PRODUCTIVE_DOMAINS):
+        return "productive"
                 
     return "neutral"
 
@@ -53,27 +84,58 @@ def analyze_tab_usage(tab_usage: Dict[str, Dict[str, Any]]) -> Dict[str, float]:
             "total_time": float
         }
     """
-    analysis = {
-        "productive_time": 0.0,
-        "distraction_time": 0.0,
-        "neutral_time": 0.0,
-        "total_time": 0.0
-    }
+    # Accumulate in locals; total is the sum of the three buckets
+    productive = distraction = neutral = 0.0
     
     for url, data in tab_usage.items():
         seconds = data.get("total_seconds", 0)
         category = categorize_url(url)
         
         if category == "productive":
-            analysis["productive_time"] += seconds
+            productive += seconds
         elif category == "distracting":
-            analysis["distraction_time"] += seconds
+            distraction += seconds
         else:
-            analysis["neutral_time"] += seconds
-            
-        analysis["total_time"] += seconds
+            neutral += seconds
         
-    return analysis
+    return {
+        "productive_time": productive,
+        "distraction_time": distraction,
+        "neutral_time": neutral,
+        "total_time": productive + distraction + neutral
+    }
+
+def format_app_usage(metrics: Dict[str, Any], limit: int = 50) -> str:
+    """
+    Format per-app usage as prompt lines, busiest apps first.
+    
+    Args:
+        metrics: DataCollector "get_metrics" payload, or its bare
+                 {app: {visits, total_seconds}} "usage" mapping
+        limit: Max apps listed; the long tail is summarized in one line
+        
+    Returns:
+        "- App: N sessions, M minutes total" lines, or "" if there is no usage
+    """
+    usage = metrics.get("usage", metrics) if metrics else {}
+    
+    # One pass into (name, visits, seconds) rows; only the top `limit` are
+    # ordered (a bounded heap, not a sort of every app), the tail is a sum
+    rows = [
+        (app, data.get("visits", 0), data.get("total_seconds", 0))
+        for app, data in usage.items()
+        if isinstance(data, dict)
+    ]
+    top = heapq.nlargest(limit, rows, key=itemgetter(2))
+    
+    lines = [
+        f"- {app}: {visits} sessions, {seconds / 60:.1f} minutes total"
+        for app, visits, seconds in top
+    ]
+    if len(rows) > limit:
+        rest = sum(row[2] for row in rows) - sum(row[2] for row in top)
+        lines.append(f"- {len(rows) - limit} other apps: {rest / 60:.1f} minutes total")
+    return "\n".join(lines)
 
 def get_current_distractor(chrome_tabs: List[Dict[str, Any]]) -> str:
     """
@@ -0,0 +1,36 @@
+"""
+Logging Utility Module
+Queued loggers: callers only enqueue records, and a single background
+listener thread writes them to stderr, so a slow stdout/stderr pipe never
+stalls the event loop or the tracker thread.
+"""
+
+import logging
+import queue
+import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_listener: QueueListener = None
+_listener_lock = threading.Lock()
+
+def _ensure_listener():
+    """Start the shared stderr listener on first use."""
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            stream = logging.StreamHandler(sys.stderr)
+            stream.setFormatter(logging.Formatter("%(message)s"))
+            _listener = QueueListener(_log_queue, stream)
+            _listener.start()
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger for name, writing through the shared queue at INFO and above."""
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        _ensure_listener()
+        logger.addHandler(QueueHandler(_log_queue))
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
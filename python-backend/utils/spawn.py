@@ -0,0 +1,23 @@
+"""
+Process Spawning Utility Module
+Every helper process (osascript, open) is started through here.
+
+close_fds=False is deliberate. With it and an absolute executable path,
+subprocess uses posix_spawn on macOS instead of fork+exec plus closing every
+possible descriptor. Nothing leaks into the child because Python creates its
+own fds non-inheritable (PEP 446).
+"""
+
+import subprocess
+from typing import Any, List
+
+OSASCRIPT = "/usr/bin/osascript"
+OPEN = "/usr/bin/open"
+
+def run(args: List[str], **kwargs: Any) -> subprocess.CompletedProcess:
+    """subprocess.run through the posix_spawn fast path."""
+    return subprocess.run(args, close_fds=False, **kwargs)
+
+def popen(args: List[str], **kwargs: Any) -> subprocess.Popen:
+    """subprocess.Popen through the posix_spawn fast path."""
+    return subprocess.Popen(args, close_fds=False, **kwargs)